@@ -1,85 +1,186 @@
 import os
-import json
 import logging
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, FrozenSet, Tuple, NamedTuple
 
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
 
-def _config_path() -> str:
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(current_dir, "data", "config.json")
 
+WEEKDAY_KEYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+WEEKDAY_INDEX = {key: idx for idx, key in enumerate(WEEKDAY_KEYS)}
 
-def _load_config() -> Dict[str, Any]:
-    path = _config_path()
+_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "config.json")
+
+
+class Slot(NamedTuple):
+    start: str
+    end: str
+
+
+# eq=False: ビューは同一性でハッシュされ、lru_cache のキーに使える
+@dataclass(frozen=True, eq=False)
+class _SettingsView:
+    closed_dates: FrozenSet[str]
+    special_by_date: Dict[str, Tuple[Slot, ...]]
+    # 以下は date.weekday()（0=月曜）で直接引ける長さ7のタプル
+    monthly_closed_by_wd: Tuple[FrozenSet[int], ...]
+    business_hours_by_wd: Tuple[Tuple[Slot, ...], ...]
+    timezone: Any
+    # None の場合は呼び出し側の default を使う
+    slot_minutes: Optional[int]
+    reservation_ui_limit_days: Optional[int]
+
+
+class _ConfigState(NamedTuple):
+    mtime: int
+    config: Dict[str, Any]
+    view: _SettingsView
+
+
+# 読込結果は (mtime, config, view) を1つのタプルとして丸ごと差し替える。
+# 並行して読むスレッドが、新旧の設定が混ざった状態を見ることはない。
+_CONFIG_STATE: Optional[_ConfigState] = None
+_CONFIG_RELOAD_LOCK = threading.Lock()
+
+
+def _config_state() -> Optional[_ConfigState]:
+    global _CONFIG_STATE
+    path = _CONFIG_PATH
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        mtime = os.stat(path).st_mtime_ns
     except FileNotFoundError:
         logging.warning(f"config.json not found: {path}")
-        return {}
+        return None
     except Exception as e:
         logging.error(f"Failed to load config.json: {e}")
-        return {}
-
-
-def _calendar_config() -> Dict[str, Any]:
-    return _load_config().get("calendar", {})
+        return None
+
+    state = _CONFIG_STATE
+    if state is not None and state.mtime == mtime:
+        return state
+
+    # 再読込は1スレッドだけが行う
+    with _CONFIG_RELOAD_LOCK:
+        state = _CONFIG_STATE
+        if state is not None and state.mtime == mtime:
+            return state
+        try:
+            with open(path, "rb") as f:
+                config = _json.loads(f.read())
+        except FileNotFoundError:
+            logging.warning(f"config.json not found: {path}")
+            return None
+        except Exception as e:
+            logging.error(f"Failed to load config.json: {e}")
+            return None
+
+        state = _ConfigState(mtime, config, _build_settings_view(config))
+        _CONFIG_STATE = state
+        _is_closed_date_cached.cache_clear()
+        _hours_for_date_cached.cache_clear()
+    return state
 
 
-def _booking_config() -> Dict[str, Any]:
-    return _load_config().get("booking", {})
-
+def _load_config() -> Dict[str, Any]:
+    state = _config_state()
+    return state.config if state is not None else {}
 
-def _salon_config() -> Dict[str, Any]:
-    return _load_config().get("salon", {})
 
+def load_config() -> Dict[str, Any]:
+    """config.json の解析結果を返す。mtime が変わるまで同じ dict を共有するため、呼び出し側で変更しないこと。"""
+    return _load_config()
 
-def get_timezone() -> str:
-    return _salon_config().get("timezone", "Asia/Tokyo")
 
+def _hours_to_tuple(hours: Any) -> Tuple[Slot, ...]:
+    return tuple(Slot(slot["start"], slot["end"]) for slot in _normalize_hours(hours))
 
-def get_slot_minutes(default: int = 30) -> int:
-    booking = _booking_config()
-    value = booking.get("slot_minutes", default)
 
+def _coerce_int(value: Any, minimum: int) -> Optional[int]:
     try:
         if isinstance(value, bool):
-            return default
+            return None
         if isinstance(value, str):
             value = int(value.strip())
         if not isinstance(value, (int, float)):
-            return default
+            return None
         value = int(value)
-        if value <= 0:
-            return default
+        if value < minimum:
+            return None
         return value
     except Exception:
-        return default
+        return None
 
 
-def get_reservation_ui_limit_days(default: int = 45) -> int:
-    booking = _booking_config()
-    value = booking.get("reservation_ui_limit_days", default)
+def _build_settings_view(config: Dict[str, Any]) -> _SettingsView:
+    calendar_cfg = config.get("calendar", {}) or {}
+    booking_cfg = config.get("booking", {}) or {}
+    salon_cfg = config.get("salon", {}) or {}
+
+    closed_dates = calendar_cfg.get("closed_dates", [])
+    if not isinstance(closed_dates, list):
+        closed_dates = []
+
+    monthly_by_wd = [set() for _ in WEEKDAY_KEYS]
+    for rule in calendar_cfg.get("monthly_closed", []) or []:
+        if not isinstance(rule, dict):
+            continue
+        weekday = rule.get("weekday")
+        weeks = rule.get("weeks", [])
+        if weekday not in WEEKDAY_INDEX or not isinstance(weeks, list):
+            continue
+        monthly_by_wd[WEEKDAY_INDEX[weekday]].update(
+            w for w in weeks if isinstance(w, int)
+        )
+
+    special_by_date: Dict[str, Tuple[Slot, ...]] = {}
+    for item in calendar_cfg.get("special_hours", []) or []:
+        if not isinstance(item, dict):
+            continue
+        item_date = item.get("date")
+        if isinstance(item_date, str) and item_date not in special_by_date:
+            special_by_date[item_date] = _hours_to_tuple(item.get("hours", []))
+
+    business_hours = calendar_cfg.get("business_hours", {})
+    if not isinstance(business_hours, dict):
+        business_hours = {}
+
+    return _SettingsView(
+        closed_dates=frozenset(str(d) for d in closed_dates),
+        special_by_date=special_by_date,
+        monthly_closed_by_wd=tuple(frozenset(weeks) for weeks in monthly_by_wd),
+        business_hours_by_wd=tuple(_hours_to_tuple(business_hours.get(k, [])) for k in WEEKDAY_KEYS),
+        timezone=salon_cfg.get("timezone", "Asia/Tokyo"),
+        slot_minutes=_coerce_int(booking_cfg.get("slot_minutes"), minimum=1),
+        reservation_ui_limit_days=_coerce_int(booking_cfg.get("reservation_ui_limit_days"), minimum=0),
+    )
 
-    try:
-        if isinstance(value, bool):
-            return default
-        if isinstance(value, str):
-            value = int(value.strip())
-        if not isinstance(value, (int, float)):
-            return default
-        value = int(value)
-        if value < 0:
-            return default
-        return value
-    except Exception:
-        return default
 
+def _settings_view() -> _SettingsView:
+    state = _config_state()
+    if state is None:
+        # 読込失敗時は空設定として扱う（キャッシュしない）
+        return _build_settings_view({})
+    return state.view
 
-def _weekday_key(d: date) -> str:
-    keys = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
-    return keys[d.weekday()]
+
+def get_timezone() -> str:
+    return _settings_view().timezone
+
+
+def get_slot_minutes(default: int = 30) -> int:
+    value = _settings_view().slot_minutes
+    return default if value is None else value
+
+
+def get_reservation_ui_limit_days(default: int = 45) -> int:
+    value = _settings_view().reservation_ui_limit_days
+    return default if value is None else value
 
 
 def _normalize_hours(hours: Any) -> List[Dict[str, str]]:
@@ -98,87 +199,77 @@ def _normalize_hours(hours: Any) -> List[Dict[str, str]]:
     return normalized
 
 
-def _is_nth_weekday_of_month(target_date: date, weekday: str, weeks: List[int]) -> bool:
-    weekday_map = {
-        "mon": 0,
-        "tue": 1,
-        "wed": 2,
-        "thu": 3,
-        "fri": 4,
-        "sat": 5,
-        "sun": 6,
-    }
+def _nth_weekday_of_month(target_date: date) -> int:
+    return (target_date.day - 1) // 7 + 1
 
-    if weekday not in weekday_map:
-        return False
-    if target_date.weekday() != weekday_map[weekday]:
-        return False
 
-    count = 0
-    d = target_date.replace(day=1)
-    while d <= target_date:
-        if d.weekday() == weekday_map[weekday]:
-            count += 1
-        d += timedelta(days=1)
+def _is_monthly_closed(view: _SettingsView, target_date: date, wd: int) -> bool:
+    weeks = view.monthly_closed_by_wd[wd]
+    return bool(weeks) and _nth_weekday_of_month(target_date) in weeks
 
-    return count in weeks
 
+@lru_cache(maxsize=4096)
+def _is_closed_date_cached(view: _SettingsView, target_date: date) -> bool:
+    target_date_str = target_date.isoformat()
+    if target_date_str in view.closed_dates:
+        return True
 
-def is_closed_date(target_date: date) -> bool:
-    calendar_cfg = _calendar_config()
-
-    closed_dates = calendar_cfg.get("closed_dates", [])
-    if target_date.strftime("%Y-%m-%d") in closed_dates:
+    wd = target_date.weekday()
+    if _is_monthly_closed(view, target_date, wd):
         return True
 
-    monthly_closed = calendar_cfg.get("monthly_closed", [])
-    for rule in monthly_closed:
-        if not isinstance(rule, dict):
-            continue
-        weekday = rule.get("weekday")
-        weeks = rule.get("weeks", [])
-        if isinstance(weeks, list) and _is_nth_weekday_of_month(target_date, weekday, weeks):
-            return True
+    return not view.business_hours_by_wd[wd]
 
-    business_hours = calendar_cfg.get("business_hours", {})
-    weekday_hours = business_hours.get(_weekday_key(target_date), [])
-    if not _normalize_hours(weekday_hours):
-        return True
 
-    return False
+def is_closed_date(target_date: date) -> bool:
+    return _is_closed_date_cached(_settings_view(), target_date)
 
 
 def is_open_date(target_date: date) -> bool:
-    return bool(get_hours_for_date(target_date))
+    return bool(get_hours_for_date_fast(target_date))
 
 
-def get_hours_for_date(target_date: date) -> List[Dict[str, str]]:
-    calendar_cfg = _calendar_config()
+def get_open_days_in_range(start_date: date, end_date: date) -> List[date]:
+    view = _settings_view()
+    open_days: List[date] = []
+    current = start_date
+    one_day = timedelta(days=1)
+
+    while current <= end_date:
+        if _hours_for_date_cached(view, current):
+            open_days.append(current)
+        current += one_day
+
+    return open_days
+
+
+@lru_cache(maxsize=4096)
+def _hours_for_date_cached(view: _SettingsView, target_date: date) -> Tuple[Slot, ...]:
+    target_date_str = target_date.isoformat()
+
+    if target_date_str in view.closed_dates:
+        return ()
+
+    wd = target_date.weekday()
+    if _is_monthly_closed(view, target_date, wd):
+        return ()
+
+    hours = view.special_by_date.get(target_date_str)
+    if hours is None:
+        hours = view.business_hours_by_wd[wd]
+    return hours
+
+
+def get_hours_for_date_fast(target_date: date) -> Tuple[Slot, ...]:
+    # 読み取り専用の呼び出し元向け。設定読込時に作った共有タプルをそのまま返す
+    view = _settings_view()
 
     if not isinstance(target_date, date):
         raise TypeError("target_date must be datetime.date")
 
-    target_date_str = target_date.strftime("%Y-%m-%d")
-
-    closed_dates = calendar_cfg.get("closed_dates", [])
-    if target_date_str in closed_dates:
-        return []
+    return _hours_for_date_cached(view, target_date)
 
-    monthly_closed = calendar_cfg.get("monthly_closed", [])
-    for rule in monthly_closed:
-        if not isinstance(rule, dict):
-            continue
-        weekday = rule.get("weekday")
-        weeks = rule.get("weeks", [])
-        if isinstance(weeks, list) and _is_nth_weekday_of_month(target_date, weekday, weeks):
-            return []
 
-    special_hours = calendar_cfg.get("special_hours", [])
-    for item in special_hours:
-        if not isinstance(item, dict):
-            continue
-        if item.get("date") == target_date_str:
-            return _normalize_hours(item.get("hours", []))
+def get_hours_for_date(target_date: date) -> List[Dict[str, str]]:
+    return [{"start": slot.start, "end": slot.end} for slot in get_hours_for_date_fast(target_date)]
 
-    business_hours = calendar_cfg.get("business_hours", {})
-    return _normalize_hours(business_hours.get(_weekday_key(target_date), []))
@@ -1,5 +1,9 @@
+import atexit
 import logging
+import os
 import re
+import threading
+import time
 from linebot.v3.messaging import (
     TemplateMessage,
     ButtonsTemplate,
@@ -15,8 +19,169 @@ from linebot.v3.messaging import (
 from api.unified_kb_loader import UnifiedKBLoader
 
 
+_KB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "unified_kb.json")
+# unified_kb.json の更新確認（stat）を行う最短間隔（秒）
+_KB_CHECK_INTERVAL = 5.0
+# snapshot は1回の読込分（loader とそこから組み立てた一覧・回答・メニュー）をまとめた dict。
+# 再読込時は snapshot ごと差し替えるため、古いデータが新しい mtime の下に残ることはない。
+_FAQ_CACHE = {
+    "mtime": None,
+    "checked_at": 0.0,
+    "snapshot": None,
+}
+_FAQ_LOCK = threading.Lock()
+_API_CLIENTS = {}
+
+# get_faq_by_number 用（全角 → 半角 変換表と Q番号パターン）
+_FAQ_NUMBER_TRANS = str.maketrans({
+    "Ｑ": "Q",
+    "ｑ": "q",
+    "０": "0",
+    "１": "1",
+    "２": "2",
+    "３": "3",
+    "４": "4",
+    "５": "5",
+    "６": "6",
+    "７": "7",
+    "８": "8",
+    "９": "9",
+    "　": " ",
+})
+_FAQ_NUMBER_RE = re.compile(r"[Qq]\s*(\d+)")
+_FAQ_NUMBER_PREFIXES = frozenset("QqＱｑ")
+
+_BACK_BUTTON = TemplateMessage(
+    alt_text="他のよくある質問も見る",
+    template=ButtonsTemplate(
+        text="他のよくある質問も見る場合はこちら",
+        actions=[
+            MessageAction(label="よくある質問一覧へ戻る", text="よくある質問")
+        ]
+    )
+)
+
+
+def get_messaging_api(configuration) -> MessagingApi:
+    """
+    Configuration ごとに MessagingApi を1つだけ生成して使い回す
+    （ApiClient の接続プールを再利用し、返信ごとのTLSハンドシェイクを避ける）
+    index.py の返信処理もこの MessagingApi を共有し、終了時は _close_api_clients でまとめて閉じる
+    """
+    key = id(configuration)
+    api = _API_CLIENTS.get(key)
+    if api is None:
+        api = MessagingApi(ApiClient(configuration))
+        _API_CLIENTS[key] = api
+    return api
+
+
+@atexit.register
+def _close_api_clients():
+    """
+    プロセス終了時に使い回していた ApiClient を閉じる
+    """
+    for api in _API_CLIENTS.values():
+        api.api_client.close()
+    _API_CLIENTS.clear()
+
+
+def _new_snapshot(loader: UnifiedKBLoader) -> dict:
+    return {
+        "loader": loader,
+        "faq_list": None,
+        "answers_by_question": None,
+        "menu_message": None,
+    }
+
+
+def _get_snapshot() -> dict:
+    """
+    unified_kb.json の読込結果をプロセス内で共有する
+    mtime の確認は _KB_CHECK_INTERVAL 秒に1回まで、変わった時だけ再読込する
+    """
+    with _FAQ_LOCK:
+        snapshot = _FAQ_CACHE["snapshot"]
+        now = time.monotonic()
+        if snapshot is None:
+            loader = UnifiedKBLoader(_KB_PATH)
+            snapshot = _new_snapshot(loader)
+            _FAQ_CACHE.update(
+                mtime=os.stat(loader.path).st_mtime_ns,
+                checked_at=now,
+                snapshot=snapshot,
+            )
+            return snapshot
+
+        if now - _FAQ_CACHE["checked_at"] < _KB_CHECK_INTERVAL:
+            return snapshot
+        _FAQ_CACHE["checked_at"] = now
+
+        path = snapshot["loader"].path
+        mtime = os.stat(path).st_mtime_ns
+        if mtime != _FAQ_CACHE["mtime"]:
+            snapshot = _new_snapshot(UnifiedKBLoader(path))
+            _FAQ_CACHE.update(mtime=mtime, snapshot=snapshot)
+        return snapshot
+
+
 def _get_loader() -> UnifiedKBLoader:
-    return UnifiedKBLoader("api/data/unified_kb.json")
+    return _get_snapshot()["loader"]
+
+
+def _snapshot_value(snapshot: dict, key: str, build):
+    """
+    snapshot[key] を返す。未作成なら build() で組み立て、同じ snapshot に保存する
+    （並行して組み立てた場合は先に保存された方を使う）
+    """
+    value = snapshot[key]
+    if value is None:
+        value = build()
+        with _FAQ_LOCK:
+            if snapshot[key] is None:
+                snapshot[key] = value
+            value = snapshot[key]
+    return value
+
+
+def _snapshot_faq(snapshot: dict) -> list:
+    return _snapshot_value(snapshot, "faq_list", snapshot["loader"].get_faq_entries)
+
+
+def _load_faq() -> list:
+    """
+    FAQ entry 一覧を取得（キャッシュ済みならそのまま返す）
+    """
+    return _snapshot_faq(_get_snapshot())
+
+
+def _load_faq_answers() -> dict:
+    """
+    質問文 → 回答文 の辞書を取得（キャッシュ済みならそのまま返す）
+    優先順位:
+    1. triggers.exact 完全一致
+    2. 表示用質問文との一致
+    """
+    snapshot = _get_snapshot()
+    return _snapshot_value(snapshot, "answers_by_question", lambda: _build_faq_answers(snapshot))
+
+
+def _build_faq_answers(snapshot: dict) -> dict:
+    loader = snapshot["loader"]
+    entries = [entry for entry in _snapshot_faq(snapshot) if isinstance(entry, dict)]
+    by_question = {}
+
+    for entry in entries:
+        triggers = entry.get("triggers", {})
+        exact = triggers.get("exact", []) if isinstance(triggers, dict) else []
+        if isinstance(exact, list):
+            for q in exact:
+                by_question.setdefault(str(q).strip(), entry)
+
+    for entry in entries:
+        by_question.setdefault(_get_faq_display_question(entry), entry)
+
+    return {q: loader.render_response(entry) for q, entry in by_question.items() if q}
 
 
 def _get_faq_display_question(entry: dict) -> str:
@@ -49,34 +214,37 @@ def _get_faq_display_question(entry: dict) -> str:
     return "よくある質問"
 
 
-def _find_faq_entry_by_question(faq_entries: list, question: str):
+def _load_faq_menu_message() -> TextMessage:
     """
-    質問文から FAQ entry を探す
-    優先順位:
-    1. triggers.exact 完全一致
-    2. 表示用質問文との一致
+    FAQ一覧メッセージを取得（unified_kb.json が更新された時だけ組み立て直す）
     """
-    if not question or not isinstance(faq_entries, list):
-        return None
+    snapshot = _get_snapshot()
+    return _snapshot_value(snapshot, "menu_message", lambda: _build_faq_menu_message(snapshot))
 
-    normalized_question = str(question).strip()
 
-    for entry in faq_entries:
-        if not isinstance(entry, dict):
-            continue
+def _build_faq_menu_message(snapshot: dict) -> TextMessage:
+    faq_list = _snapshot_faq(snapshot)[:10]
+    if not faq_list:
+        raise ValueError("FAQ list is empty")
 
-        triggers = entry.get("triggers", {})
-        exact = triggers.get("exact", []) if isinstance(triggers, dict) else []
-        if isinstance(exact, list):
-            for q in exact:
-                if str(q).strip() == normalized_question:
-                    return entry
+    menu_text = "\n".join((
+        "よくある質問はこちらです✨",
+        "気になる番号をタップしてください！",
+        "",
+        "",
+        *(f"Q{idx}. {_get_faq_display_question(faq)}" for idx, faq in enumerate(faq_list, start=1)),
+        "",
+        "",
+        "📩上記以外でも、気になることがあればお気軽にメッセージください！",
+        "そのままご予約もご案内できます✨",
+    ))
 
-    for entry in faq_entries:
-        if _get_faq_display_question(entry) == normalized_question:
-            return entry
+    qr_items = [
+        QuickReplyItem(action=MessageAction(label=f"Q{i}", text=f"Q{i}"))
+        for i in range(1, len(faq_list) + 1)
+    ]
 
-    return None
+    return TextMessage(text=menu_text, quick_reply=QuickReply(items=qr_items))
 
 
 def send_faq_menu(reply_token, configuration):
@@ -84,51 +252,16 @@ def send_faq_menu(reply_token, configuration):
     FAQ一覧をQ1〜Q10形式で1メッセージ表示
     unified_kb.json の type='faq' を使用
     """
-    try:
-        loader = _get_loader()
-        faq_list = loader.get_faq_entries()[:10]
-
-        if not faq_list:
-            raise ValueError("FAQ list is empty")
-
-        lines = [
-            "よくある質問はこちらです✨",
-            "気になる番号をタップしてください！",
-            "",
-            ""
-        ]
-
-        for idx, faq in enumerate(faq_list, start=1):
-            lines.append(f"Q{idx}. {_get_faq_display_question(faq)}")
-
-        lines.append("")
-        lines.append("")
-        lines.append("📩上記以外でも、気になることがあればお気軽にメッセージください！")
-        lines.append("そのままご予約もご案内できます✨")
+    faq_menu_message = _load_faq_menu_message()
 
-        qr_items = [
-            QuickReplyItem(action=MessageAction(label=f"Q{i}", text=f"Q{i}"))
-            for i in range(1, len(faq_list) + 1)
-        ]
-
-        faq_menu_message = TextMessage(
-            text="\n".join(lines),
-            quick_reply=QuickReply(items=qr_items) if qr_items else None
+    get_messaging_api(configuration).reply_message(
+        ReplyMessageRequest(
+            reply_token=reply_token,
+            messages=[faq_menu_message]
         )
+    )
 
-        with ApiClient(configuration) as api_client:
-            MessagingApi(api_client).reply_message(
-                ReplyMessageRequest(
-                    reply_token=reply_token,
-                    messages=[faq_menu_message]
-                )
-            )
-
-        print(f"FAQ menu sent successfully ({len(faq_list)} items)")
-
-    except Exception as e:
-        logging.error(f"Error in send_faq_menu: {e}", exc_info=True)
-        raise
+    logging.debug("FAQ menu sent successfully")
 
 
 def get_faq_by_number(faq_number):
@@ -153,33 +286,21 @@ def get_faq_by_number(faq_number):
 
         text = str(faq_number).strip()
 
+        # 大半のメッセージはQで始まらないため、変換前に先頭1文字だけで弾く
+        if text[:1] not in _FAQ_NUMBER_PREFIXES:
+            return None
+
         # 全角 → 半角
-        trans = str.maketrans({
-            "Ｑ": "Q",
-            "ｑ": "q",
-            "０": "0",
-            "１": "1",
-            "２": "2",
-            "３": "3",
-            "４": "4",
-            "５": "5",
-            "６": "6",
-            "７": "7",
-            "８": "8",
-            "９": "9",
-            "　": " ",
-        })
-        text = text.translate(trans)
+        text = text.translate(_FAQ_NUMBER_TRANS)
 
         # Q1 / q1 / Q 1 / q 1 のみ許可
-        match = re.fullmatch(r"[Qq]\s*(\d+)", text)
+        match = _FAQ_NUMBER_RE.fullmatch(text)
         if not match:
             return None
 
         number = int(match.group(1))
 
-        loader = _get_loader()
-        faq_list = loader.get_faq_entries()
+        faq_list = _load_faq()
 
         if 1 <= number <= len(faq_list):
             return faq_list[number - 1]
@@ -195,71 +316,35 @@ def send_faq_answer_by_item(reply_token, faq_item, configuration):
     """
     FAQ item（unified entry）から直接回答を送信
     """
-    try:
-        loader = _get_loader()
-        answer = loader.render_response(faq_item)
-
-        if not answer:
-            answer = "申し訳ありません、そのFAQ番号は見つかりませんでした。"
-
-        back_button = TemplateMessage(
-            alt_text="他のよくある質問も見る",
-            template=ButtonsTemplate(
-                text="他のよくある質問も見る場合はこちら",
-                actions=[
-                    MessageAction(label="よくある質問一覧へ戻る", text="よくある質問")
-                ]
-            )
-        )
+    loader = _get_loader()
+    answer = loader.render_response(faq_item)
 
-        with ApiClient(configuration) as api_client:
-            MessagingApi(api_client).reply_message(
-                ReplyMessageRequest(
-                    reply_token=reply_token,
-                    messages=[TextMessage(text=answer), back_button]
-                )
-            )
+    if not answer:
+        answer = "申し訳ありません、そのFAQ番号は見つかりませんでした。"
 
-        print(f"FAQ answer sent successfully for question: {_get_faq_display_question(faq_item)}")
+    get_messaging_api(configuration).reply_message(
+        ReplyMessageRequest(
+            reply_token=reply_token,
+            messages=[TextMessage(text=answer), _BACK_BUTTON]
+        )
+    )
 
-    except Exception as e:
-        logging.error(f"Error in send_faq_answer_by_item: {e}", exc_info=True)
-        raise
+    logging.debug("FAQ answer sent successfully for question: %s", _get_faq_display_question(faq_item))
 
 
 def send_faq_answer(reply_token, question, configuration):
     """
     質問文から unified_kb.json の FAQ を検索して回答を送信
     """
-    try:
-        loader = _get_loader()
-        faq_list = loader.get_faq_entries()
-        faq_item = _find_faq_entry_by_question(faq_list, question)
-
-        answer = loader.render_response(faq_item) if faq_item else ""
-        if not answer:
-            answer = "申し訳ありません、その質問は見つかりませんでした。"
-
-        back_button = TemplateMessage(
-            alt_text="他のよくある質問も見る",
-            template=ButtonsTemplate(
-                text="他のよくある質問も見る場合はこちら",
-                actions=[
-                    MessageAction(label="よくある質問一覧へ戻る", text="よくある質問")
-                ]
-            )
+    answer = _load_faq_answers().get(str(question).strip()) if question else ""
+    if not answer:
+        answer = "申し訳ありません、その質問は見つかりませんでした。"
+
+    get_messaging_api(configuration).reply_message(
+        ReplyMessageRequest(
+            reply_token=reply_token,
+            messages=[TextMessage(text=answer), _BACK_BUTTON]
         )
+    )
 
-        with ApiClient(configuration) as api_client:
-            MessagingApi(api_client).reply_message(
-                ReplyMessageRequest(
-                    reply_token=reply_token,
-                    messages=[TextMessage(text=answer), back_button]
-                )
-            )
-
-        print(f"FAQ answer sent successfully for question: {question}")
-
-    except Exception as e:
-        logging.error(f"Error in send_faq_answer: {e}", exc_info=True)
-        raise
+    logging.debug("FAQ answer sent successfully for question: %s", question)
@@ -5,28 +5,168 @@ Google Calendar integration for salon reservations
 - Load-balanced free-staff assignment version
 """
 import os
-import json
 import logging
+import re
+import threading
 import uuid
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import lru_cache
 from datetime import datetime, timedelta, date, time
+from time import monotonic
 from typing import Dict, Any, Optional, List, Tuple
 
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
 import pytz
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from dotenv import load_dotenv
 
-from api.business_hours import get_hours_for_date, is_closed_date, get_timezone
+from api.business_hours import get_hours_for_date, is_closed_date, get_timezone, load_config
 from api.staff_attendance import (
     get_staff_attendance_for_date,
     get_staff_effective_periods_for_date,
     is_staff_working_for_time,
 )
 
+# "[予約] {service} - {client} ({staff})"
+_RESERVATION_SUMMARY_RE = re.compile(r"^\[予約\] (.+) - (.+) \((.+)\)$")
+# "User ID: {user_id}" line in reservation descriptions
+_USER_ID_RE = re.compile(r"User ID:([^\n]*)")
+
+# Partial response for events().list: every caller (slots, conflicts, workload, reminders, cancel) reads only these
+_EVENT_LIST_FIELDS = "items(id,status,summary,description,start,end)"
+# Page size for q= reservation searches; further pages are fetched only when the id is not on the first one
+_RESERVATION_SEARCH_PAGE_SIZE = 50
+
+# Short-lived events().list results shared across helper instances, keyed by (calendarId, timeMin, timeMax).
+# Any write through a helper clears it, so only changes made outside this process can be up to TTL stale.
+_EVENTS_LIST_TTL_SECONDS = 20
+_EVENTS_LIST_MAX_ENTRIES = 512
+_EVENTS_LIST_CACHE: Dict[Tuple[str, str, str], Tuple[float, List[Dict[str, Any]]]] = {}
+_EVENTS_LIST_LOCK = threading.Lock()
+# Bumped by every clear; a fetch that started before a clear must not store its (possibly stale) result
+_EVENTS_LIST_GENERATION = 0
+
+# Marks a runtime-cache miss, since some caches store None as a real result
+_MISSING = object()
+
+
+def _get_shared_events(key: Tuple[str, str, str]) -> Optional[List[Dict[str, Any]]]:
+    with _EVENTS_LIST_LOCK:
+        cached = _EVENTS_LIST_CACHE.get(key)
+        if cached is None:
+            return None
+        if monotonic() - cached[0] >= _EVENTS_LIST_TTL_SECONDS:
+            del _EVENTS_LIST_CACHE[key]
+            return None
+        return list(cached[1])
+
+
+def _shared_events_generation() -> int:
+    with _EVENTS_LIST_LOCK:
+        return _EVENTS_LIST_GENERATION
+
+
+def _store_shared_events(key: Tuple[str, str, str], events: List[Dict[str, Any]], generation: int) -> None:
+    now = monotonic()
+    with _EVENTS_LIST_LOCK:
+        if generation != _EVENTS_LIST_GENERATION:
+            return
+        if len(_EVENTS_LIST_CACHE) >= _EVENTS_LIST_MAX_ENTRIES:
+            expired = [k for k, (stored_at, _) in _EVENTS_LIST_CACHE.items() if now - stored_at >= _EVENTS_LIST_TTL_SECONDS]
+            for stale_key in expired:
+                del _EVENTS_LIST_CACHE[stale_key]
+            while len(_EVENTS_LIST_CACHE) >= _EVENTS_LIST_MAX_ENTRIES:
+                del _EVENTS_LIST_CACHE[next(iter(_EVENTS_LIST_CACHE))]
+        _EVENTS_LIST_CACHE[key] = (now, list(events))
+
+
+def _clear_shared_events() -> None:
+    global _EVENTS_LIST_GENERATION
+    with _EVENTS_LIST_LOCK:
+        _EVENTS_LIST_CACHE.clear()
+        _EVENTS_LIST_GENERATION += 1
+
+
+@lru_cache(maxsize=256)
+def _parse_hhmm(time_str: str) -> time:
+    # Business-period bounds repeat for every day in a slot window; parse each distinct value once
+    return datetime.strptime(time_str, "%H:%M").time()
+
+
+def _format_hhmm(value: datetime) -> str:
+    return f"{value.hour:02d}:{value.minute:02d}"
+
+
+@lru_cache(maxsize=1024)
+def _parse_date(date_str: str) -> datetime:
+    return datetime.strptime(date_str, "%Y-%m-%d")
+
+
+@lru_cache(maxsize=1024)
+def _parse_date_time(date_str: str, time_str: str) -> datetime:
+    # Staff loops re-check the same (date, start/end) pair; strptime per call dominated those checks
+    return datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+
+
+@lru_cache(maxsize=4096)
+def _parse_event_date_time(value: str, tz_name: str) -> datetime:
+    # Salon events cluster on the same few start/end strings, so repeated boundaries hit the cache
+    tz = pytz.timezone(tz_name)
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        return tz.localize(dt)
+    return dt.astimezone(tz)
+
+
+@lru_cache(maxsize=1024)
+def _parse_event_date(value: str, tz_name: str) -> datetime:
+    return pytz.timezone(tz_name).localize(datetime.strptime(value, "%Y-%m-%d"))
+
+
+# Service-account credentials are shared process-wide so the OAuth access token is reused across helpers.
+# Built services are kept per thread: their httplib2 transport keeps connections alive but is not thread-safe.
+_AUTH_CACHE: Dict[str, Any] = {"key": None, "info": None, "credentials": None}
+_THREAD_SERVICES = threading.local()
+
+# reservation_id -> (calendar_id, event_id) for events created or found in this process, least recently used first.
+# Entries are hints only: every hit is re-validated with events().get before use.
+_RESERVATION_EVENT_INDEX_MAX_ENTRIES = 2048
+_RESERVATION_EVENT_INDEX: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+_RESERVATION_EVENT_INDEX_LOCK = threading.Lock()
+
+
+def _lookup_reservation_event(reservation_id: str) -> Optional[Tuple[str, str]]:
+    with _RESERVATION_EVENT_INDEX_LOCK:
+        location = _RESERVATION_EVENT_INDEX.get(reservation_id)
+        if location is not None:
+            _RESERVATION_EVENT_INDEX.move_to_end(reservation_id)
+        return location
+
+
+def _remember_reservation_event(reservation_id: str, calendar_id: str, event_id: str) -> None:
+    with _RESERVATION_EVENT_INDEX_LOCK:
+        _RESERVATION_EVENT_INDEX[reservation_id] = (calendar_id, event_id)
+        _RESERVATION_EVENT_INDEX.move_to_end(reservation_id)
+        while len(_RESERVATION_EVENT_INDEX) > _RESERVATION_EVENT_INDEX_MAX_ENTRIES:
+            _RESERVATION_EVENT_INDEX.popitem(last=False)
+
+
+def _forget_reservation_event(reservation_id: str) -> None:
+    with _RESERVATION_EVENT_INDEX_LOCK:
+        _RESERVATION_EVENT_INDEX.pop(reservation_id, None)
+
 
 class GoogleCalendarHelper:
     WEEKDAY_KEYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+    # Calendar API accepts at most 50 calls per batch request
+    BATCH_LIMIT = 50
 
     def __init__(self):
         load_dotenv()
@@ -37,61 +177,138 @@ class GoogleCalendarHelper:
         self.timezone = self.config_data.get("salon", {}).get("timezone", get_timezone())
         self.staff_data = self.config_data.get("staff", {})
         self.services = self.config_data.get("services", {})
+        self._build_lookup_indexes()
+
+        self._tz = None
+        self._tz_name = None
 
         self.calendar_id = None
-        self.service = None
+        self._service = None
+        self._auth_attempted = False
+        # True once _authenticate succeeded: each thread then gets its own built client
+        self._per_thread_service = False
+        self._auth_lock = threading.Lock()
         self.service_account_email = None
-        self._config_mtime = self._get_config_mtime()
 
         self._events_cache: Dict[str, List[Dict[str, Any]]] = {}
         self._all_events_cache: Dict[str, List[Dict[str, Any]]] = {}
         self._slots_cache: Dict[str, List[Dict[str, Any]]] = {}
         self._assignable_staff_cache: Dict[str, Optional[str]] = {}
         self._free_staff_assignment_cache: Dict[str, Optional[Dict[str, Any]]] = {}
-
-        try:
-            self._authenticate()
-        except Exception as e:
-            logging.error(f"Failed to initialize Google Calendar: {e}", exc_info=True)
-            self.service = None
-
-    def _config_path(self) -> str:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        return os.path.join(current_dir, "data", "config.json")
-
-    def _get_config_mtime(self) -> Optional[float]:
-        try:
-            return os.path.getmtime(self._config_path())
-        except Exception:
-            return None
+        self._busy_index_cache: Dict[str, Tuple[List[datetime], List[datetime]]] = {}
+        # Webhooks for different users run concurrently, so every runtime-cache access goes through this lock
+        self._cache_lock = threading.Lock()
+        self._cache_generation = 0
+
+    @property
+    def service(self):
+        """Calendar API client, authenticated on first access rather than in __init__."""
+        if not self._auth_attempted:
+            with self._auth_lock:
+                if not self._auth_attempted:
+                    self._auth_attempted = True
+                    try:
+                        self._authenticate()
+                    except Exception as e:
+                        logging.error(f"Failed to initialize Google Calendar: {e}", exc_info=True)
+                        self._service = None
+        if self._per_thread_service:
+            return self._thread_service()
+        return self._service
+
+    @service.setter
+    def service(self, value) -> None:
+        self._auth_attempted = True
+        self._per_thread_service = False
+        self._service = value
+
+    def _thread_service(self):
+        """Calendar client for the current thread, built from the shared credentials on first use."""
+        services = getattr(_THREAD_SERVICES, "services", None)
+        if services is None:
+            services = _THREAD_SERVICES.services = {}
+        service = services.get(self.service_account_json)
+        if service is None:
+            try:
+                service = build(
+                    "calendar",
+                    "v3",
+                    credentials=_AUTH_CACHE["credentials"],
+                    static_discovery=True,
+                    cache_discovery=False,
+                )
+            except Exception as e:
+                logging.error(f"Failed to build Google Calendar client: {e}", exc_info=True)
+                return None
+            services[self.service_account_json] = service
+        return service
 
     def _load_config_data(self) -> Dict[str, Any]:
-        try:
-            with open(self._config_path(), "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Failed to load config data: {e}")
-            return {}
+        # Shared with business_hours so both modules see the same reload of config.json
+        return load_config()
+
+    def _build_lookup_indexes(self) -> None:
+        """Index staff by name and services by id/name (first match wins, as in the old scans)."""
+        self._staff_by_name: Dict[str, Dict[str, Any]] = {}
+        for staff_data in self.staff_data.values():
+            if isinstance(staff_data, dict) and isinstance(staff_data.get("name"), str):
+                self._staff_by_name.setdefault(staff_data["name"], staff_data)
+        # staff name -> own calendar id (None when unset; callers fall back to self.calendar_id)
+        self._staff_calendar_ids: Dict[str, Optional[str]] = {
+            name: staff_data.get("calendar_id") or None for name, staff_data in self._staff_by_name.items()
+        }
+
+        self._service_by_id: Dict[str, Dict[str, Any]] = {}
+        self._service_by_name: Dict[str, Dict[str, Any]] = {}
+        for data in self.services.values():
+            if not isinstance(data, dict):
+                continue
+            if data.get("id"):
+                self._service_by_id.setdefault(str(data["id"]).lower(), data)
+            if isinstance(data.get("name"), str):
+                self._service_by_name.setdefault(data["name"], data)
 
     def _clear_runtime_caches(self) -> None:
-        self._events_cache.clear()
-        self._all_events_cache.clear()
-        self._slots_cache.clear()
-        self._assignable_staff_cache.clear()
-        self._free_staff_assignment_cache.clear()
+        with self._cache_lock:
+            self._events_cache.clear()
+            self._all_events_cache.clear()
+            self._slots_cache.clear()
+            self._assignable_staff_cache.clear()
+            self._free_staff_assignment_cache.clear()
+            self._busy_index_cache.clear()
+            self._cache_generation += 1
+        _clear_shared_events()
+
+    def _cache_get(self, cache: Dict[str, Any], key: str) -> Any:
+        """Return the cached value for key, or _MISSING."""
+        with self._cache_lock:
+            return cache.get(key, _MISSING)
+
+    def _cache_put(self, cache: Dict[str, Any], key: str, value: Any, generation: int) -> None:
+        """Store value unless the caches were cleared after generation was read (the value may predate a write)."""
+        with self._cache_lock:
+            if generation == self._cache_generation:
+                cache[key] = value
 
     def _reload_config_data(self, force: bool = False) -> None:
-        current_mtime = self._get_config_mtime()
-        if not force and current_mtime is not None and self._config_mtime == current_mtime:
+        config_data = self._load_config_data()
+        if not force and config_data is self.config_data:
             return
 
-        self.config_data = self._load_config_data()
+        self.config_data = config_data
         self.timezone = self.config_data.get("salon", {}).get("timezone", get_timezone())
         self.staff_data = self.config_data.get("staff", {})
         self.services = self.config_data.get("services", {})
-        self._config_mtime = current_mtime
+        self._build_lookup_indexes()
         self._clear_runtime_caches()
 
+    def _get_tz(self):
+        # pytz.timezone() per call is a registry lookup; resolve again only when timezone changes
+        if self._tz_name != self.timezone:
+            self._tz = pytz.timezone(self.timezone)
+            self._tz_name = self.timezone
+        return self._tz
+
     def _normalize_time_format(self, time_str: str) -> Optional[str]:
         try:
             parts = time_str.split(":")
@@ -108,7 +325,12 @@ class GoogleCalendarHelper:
                 return None
 
             normalized = f"{hour_part}:{minute_part}"
-            datetime.strptime(normalized, "%H:%M")
+            if normalized.isascii():
+                # Digits were checked above, so a range check is all strptime would add
+                if int(hour_part) > 23 or int(minute_part) > 59:
+                    return None
+            else:
+                datetime.strptime(normalized, "%H:%M")
             return normalized
         except Exception:
             return None
@@ -117,7 +339,7 @@ class GoogleCalendarHelper:
         normalized = self._normalize_time_format(time_str)
         if not normalized:
             return None
-        return datetime.strptime(normalized, "%H:%M").time()
+        return _parse_hhmm(normalized)
 
     def _time_str_to_minutes(self, time_str: str) -> Optional[int]:
         normalized = self._normalize_time_format(time_str)
@@ -147,19 +369,23 @@ class GoogleCalendarHelper:
     def _authenticate(self):
         try:
             if not self.service_account_json:
-                print("GOOGLE_SERVICE_ACCOUNT_JSON not set, calendar integration disabled")
+                logging.warning("GOOGLE_SERVICE_ACCOUNT_JSON not set, calendar integration disabled")
                 return
 
-            try:
-                service_account_info = json.loads(self.service_account_json)
-            except json.JSONDecodeError as e:
-                print(f"Invalid JSON in GOOGLE_SERVICE_ACCOUNT_JSON: {e}")
-                return
+            if _AUTH_CACHE["key"] != self.service_account_json:
+                try:
+                    service_account_info = _json.loads(self.service_account_json)
+                except _json.JSONDecodeError as e:
+                    logging.error(f"Invalid JSON in GOOGLE_SERVICE_ACCOUNT_JSON: {e}")
+                    return
+
+                credentials = service_account.Credentials.from_service_account_info(
+                    service_account_info,
+                    scopes=["https://www.googleapis.com/auth/calendar"],
+                )
+                _AUTH_CACHE.update(key=self.service_account_json, info=service_account_info, credentials=credentials)
 
-            credentials = service_account.Credentials.from_service_account_info(
-                service_account_info,
-                scopes=["https://www.googleapis.com/auth/calendar"],
-            )
+            service_account_info = _AUTH_CACHE["info"]
 
             self.service_account_email = service_account_info.get("client_email", "")
             if self.service_account_email:
@@ -169,7 +395,9 @@ class GoogleCalendarHelper:
             else:
                 logging.info("Google Calendar API authenticated successfully (service account email not found)")
 
-            self.service = build("calendar", "v3", credentials=credentials)
+            service = self._thread_service()
+            self.service = service
+            self._per_thread_service = service is not None
 
         except Exception as e:
             logging.error(f"Failed to authenticate with Google Calendar: {e}", exc_info=True)
@@ -181,7 +409,7 @@ class GoogleCalendarHelper:
         Format: RES-YYYYMMDD-XXXXXX
         The previous millisecond modulo format could collide under concurrent reservations.
         """
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+        date_obj = _parse_date(date_str)
         date_part = date_obj.strftime("%Y%m%d")
         suffix = uuid.uuid4().hex[:6].upper()
         return f"RES-{date_part}-{suffix}"
@@ -192,19 +420,17 @@ class GoogleCalendarHelper:
 
         ident = str(service_identifier).strip()
 
-        for _key, data in self.services.items():
-            if isinstance(data, dict) and data.get("id") and str(data.get("id")).lower() == ident.lower():
-                return int(data.get("duration", 60))
-
-        service_data = self.services.get(ident)
-        if service_data and isinstance(service_data, dict):
-            return int(service_data.get("duration", 60))
-
-        for _key, data in self.services.items():
-            if isinstance(data, dict) and data.get("name") == ident:
-                return int(data.get("duration", 60))
+        data = self._service_by_id.get(ident.lower())
+        if data is None:
+            service_data = self.services.get(ident)
+            if service_data and isinstance(service_data, dict):
+                data = service_data
+            else:
+                data = self._service_by_name.get(ident)
 
-        return 60
+        if data is None:
+            return 60
+        return int(data.get("duration", 60))
 
     def _supports_all_services(self, staff_data: Dict[str, Any], service_ids: Optional[List[str]] = None) -> bool:
         normalized_ids = self._normalize_service_ids(service_ids=service_ids)
@@ -219,13 +445,7 @@ class GoogleCalendarHelper:
         if not staff_name:
             return None
 
-        for _staff_id, staff_data in self.staff_data.items():
-            if not isinstance(staff_data, dict):
-                continue
-            if staff_data.get("name") == staff_name:
-                return staff_data
-
-        return None
+        return self._staff_by_name.get(staff_name)
 
     def _get_weekday_key(self, target_date: date) -> str:
         return self.WEEKDAY_KEYS[target_date.weekday()]
@@ -265,7 +485,7 @@ class GoogleCalendarHelper:
         staff_name: Optional[str] = None,
     ) -> bool:
         try:
-            target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+            target_date = _parse_date(date_str).date()
             if not staff_name or staff_name in {"未指定", "指名なし", "おまかせ", "free"}:
                 effective_periods = self._get_effective_business_periods_for_staff(target_date, None)
                 start_min = self._time_str_to_minutes(start_time)
@@ -301,7 +521,7 @@ class GoogleCalendarHelper:
         staff_name: str,
     ) -> Dict[str, Any]:
         try:
-            target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+            target_date = _parse_date(date_str).date()
             detail = self.get_staff_attendance_for_date(staff_name, target_date)
             detail = dict(detail)
             detail["fits_time"] = self._is_within_effective_business_periods(date_str, start_time, end_time, staff_name)
@@ -337,11 +557,13 @@ class GoogleCalendarHelper:
             if attendance_reason != "ok":
                 return attendance_reason
 
-            start_datetime = datetime.strptime(f"{date_str} {start_time}", "%Y-%m-%d %H:%M")
-            end_datetime = datetime.strptime(f"{date_str} {end_time}", "%Y-%m-%d %H:%M")
-            for event_start, event_end in self._build_event_ranges_for_staff(date_str, staff_name, exclude_reservation_id):
-                if start_datetime < event_end and end_datetime > event_start:
-                    return "busy"
+            start_datetime = _parse_date_time(date_str, start_time)
+            end_datetime = _parse_date_time(date_str, end_time)
+            starts, max_ends = self._get_busy_index(date_str, staff_name, exclude_reservation_id)
+            # Only events starting before the requested end can overlap; the latest end among them decides
+            idx = bisect_left(starts, end_datetime)
+            if idx and max_ends[idx - 1] > start_datetime:
+                return "busy"
             return "ok"
         except Exception as e:
             logging.error(f"Error checking staff availability reason: {e}", exc_info=True)
@@ -371,174 +593,193 @@ class GoogleCalendarHelper:
             return {"success": False, "reason": "calendar_not_configured"}
 
         try:
-            self._reload_config_data()
+            prepared = self._prepare_reservation_event(reservation_data, client_name)
+            if "event" not in prepared:
+                return prepared
 
-            date_str = reservation_data["date"]
-            services = reservation_data.get("services") or reservation_data.get("cart") or []
-            service_name = reservation_data.get("service") or " / ".join(
-                [str(item.get("service_name", "")).strip() for item in services if isinstance(item, dict)]
-            )
-            staff = reservation_data.get("assigned_staff") or reservation_data.get("staff")
-            user_id = reservation_data.get("user_id", "")
-            selected_staff = reservation_data.get("selected_staff")
-            assigned_staff = reservation_data.get("assigned_staff") or staff
-
-            if not staff:
-                logging.error(f"Staff name missing in reservation_data: {reservation_data}")
-                return {"success": False, "reason": "staff_missing"}
-
-            staff_calendar_id = self._get_staff_calendar_id(staff)
-            if not staff_calendar_id:
-                logging.error(f"Staff calendar ID not found for staff '{staff}'")
-                return {"success": False, "reason": "staff_calendar_missing"}
-
-            if "start_time" in reservation_data and "end_time" in reservation_data:
-                start_time_str = reservation_data["start_time"]
-                end_time_str = reservation_data["end_time"]
-                start_datetime = datetime.strptime(f"{date_str} {start_time_str}", "%Y-%m-%d %H:%M")
-                end_datetime = datetime.strptime(f"{date_str} {end_time_str}", "%Y-%m-%d %H:%M")
-            else:
-                time_str = reservation_data["time"]
-                start_datetime = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-                duration_minutes = int(reservation_data.get("total_duration", 0) or 0)
-                if duration_minutes <= 0:
-                    duration_minutes = self._get_service_duration_minutes(
-                        reservation_data.get("service_id") or reservation_data.get("service")
-                    )
-                end_datetime = start_datetime + timedelta(minutes=duration_minutes)
+            created_event = self.service.events().insert(
+                calendarId=prepared["calendar_id"], body=prepared["event"]
+            ).execute()
+            return self._record_created_event(prepared, created_event)
 
-            start_time_str = start_datetime.strftime("%H:%M")
-            end_time_str = end_datetime.strftime("%H:%M")
-            duration_minutes = int((end_datetime - start_datetime).total_seconds() / 60)
+        except HttpError as e:
+            logging.error(f"Google Calendar API error: {e}", exc_info=True)
+            return {"success": False, "reason": "calendar_api_error", "error": str(e)}
+        except Exception as e:
+            logging.error(f"Failed to create calendar event: {e}", exc_info=True)
+            return {"success": False, "reason": "calendar_create_exception", "error": str(e)}
+
+    def _prepare_reservation_event(self, reservation_data: Dict[str, Any], client_name: str) -> Dict[str, Any]:
+        """Validate reservation_data and build the Calendar event body.
+
+        Returns {"calendar_id", "event", "reservation_id"} when the event may be
+        inserted, otherwise a failure result with "success": False and "reason".
+        """
+        self._reload_config_data()
 
-            if not self._is_within_effective_business_periods(date_str, start_time_str, end_time_str, staff):
-                logging.error(
-                    f"Reservation rejected by attendance/business-hours check: "
-                    f"staff={staff}, date={date_str}, start={start_time_str}, end={end_time_str}"
+        date_str = reservation_data["date"]
+        services = reservation_data.get("services") or reservation_data.get("cart") or []
+        service_name = reservation_data.get("service") or " / ".join(
+            [str(item.get("service_name", "")).strip() for item in services if isinstance(item, dict)]
+        )
+        staff = reservation_data.get("assigned_staff") or reservation_data.get("staff")
+        user_id = reservation_data.get("user_id", "")
+        selected_staff = reservation_data.get("selected_staff")
+        assigned_staff = reservation_data.get("assigned_staff") or staff
+
+        if not staff:
+            logging.error(f"Staff name missing in reservation_data: {reservation_data}")
+            return {"success": False, "reason": "staff_missing"}
+
+        staff_calendar_id = self._get_staff_calendar_id(staff)
+        if not staff_calendar_id:
+            logging.error(f"Staff calendar ID not found for staff '{staff}'")
+            return {"success": False, "reason": "staff_calendar_missing"}
+
+        if "start_time" in reservation_data and "end_time" in reservation_data:
+            start_time_str = reservation_data["start_time"]
+            end_time_str = reservation_data["end_time"]
+            start_datetime = _parse_date_time(date_str, start_time_str)
+            end_datetime = _parse_date_time(date_str, end_time_str)
+        else:
+            time_str = reservation_data["time"]
+            start_datetime = _parse_date_time(date_str, time_str)
+            duration_minutes = int(reservation_data.get("total_duration", 0) or 0)
+            if duration_minutes <= 0:
+                duration_minutes = self._get_service_duration_minutes(
+                    reservation_data.get("service_id") or reservation_data.get("service")
                 )
-                return {"success": False, "reason": "outside_business_or_attendance"}
+            end_datetime = start_datetime + timedelta(minutes=duration_minutes)
 
-            # Final race-condition guard immediately before Calendar insert.
-            availability_reason = self.check_staff_availability_reason(
-                date_str=date_str,
-                start_time=start_time_str,
-                end_time=end_time_str,
-                staff_name=staff,
-                exclude_reservation_id=reservation_data.get("exclude_reservation_id"),
+        start_time_str = start_datetime.strftime("%H:%M")
+        end_time_str = end_datetime.strftime("%H:%M")
+        duration_minutes = int((end_datetime - start_datetime).total_seconds() / 60)
+
+        if not self._is_within_effective_business_periods(date_str, start_time_str, end_time_str, staff):
+            logging.error(
+                f"Reservation rejected by attendance/business-hours check: "
+                f"staff={staff}, date={date_str}, start={start_time_str}, end={end_time_str}"
             )
-            if availability_reason != "ok":
-                logging.warning(
-                    f"Final availability check failed before calendar insert. "
-                    f"reason={availability_reason}, staff={staff}, date={date_str}, "
-                    f"start={start_time_str}, end={end_time_str}"
-                )
-                return {"success": False, "reason": availability_reason}
+            return {"success": False, "reason": "outside_business_or_attendance"}
 
-            tokyo_tz = pytz.timezone(self.timezone)
-            if start_datetime.tzinfo is None:
-                start_datetime = tokyo_tz.localize(start_datetime)
-            else:
-                start_datetime = start_datetime.astimezone(tokyo_tz)
+        # Final race-condition guard immediately before Calendar insert.
+        availability_reason = self.check_staff_availability_reason(
+            date_str=date_str,
+            start_time=start_time_str,
+            end_time=end_time_str,
+            staff_name=staff,
+            exclude_reservation_id=reservation_data.get("exclude_reservation_id"),
+        )
+        if availability_reason != "ok":
+            logging.warning(
+                f"Final availability check failed before calendar insert. "
+                f"reason={availability_reason}, staff={staff}, date={date_str}, "
+                f"start={start_time_str}, end={end_time_str}"
+            )
+            return {"success": False, "reason": availability_reason}
+
+        tokyo_tz = self._get_tz()
+        if start_datetime.tzinfo is None:
+            start_datetime = tokyo_tz.localize(start_datetime)
+        else:
+            start_datetime = start_datetime.astimezone(tokyo_tz)
+
+        if end_datetime.tzinfo is None:
+            end_datetime = tokyo_tz.localize(end_datetime)
+        else:
+            end_datetime = end_datetime.astimezone(tokyo_tz)
+
+        reservation_id = reservation_data.get("reservation_id", self.generate_reservation_id(date_str))
+
+        description_lines = [
+            f"予約ID: {reservation_id}",
+            f"サービス: {service_name}",
+            f"サービス一覧: {service_name}",
+            f"担当者: {assigned_staff}",
+            f"お客様: {client_name}",
+            f"所要時間: {duration_minutes}分",
+            "予約元: LINE Bot",
+        ]
+        store_id = reservation_data.get("store_id")
+        if store_id:
+            description_lines.append(f"Store ID: {store_id}")
+        if selected_staff:
+            description_lines.append(f"Selected Staff: {selected_staff}")
+        if assigned_staff:
+            description_lines.append(f"Assigned Staff: {assigned_staff}")
+        if user_id:
+            description_lines.append(f"User ID: {user_id}")
+
+        event = {
+            "summary": f"[予約] {service_name} - {client_name} ({assigned_staff})",
+            "description": "\n".join(description_lines),
+            "start": {"dateTime": start_datetime.isoformat(), "timeZone": self.timezone},
+            "end": {"dateTime": end_datetime.isoformat(), "timeZone": self.timezone},
+        }
 
-            if end_datetime.tzinfo is None:
-                end_datetime = tokyo_tz.localize(end_datetime)
-            else:
-                end_datetime = end_datetime.astimezone(tokyo_tz)
-
-            reservation_id = reservation_data.get("reservation_id", self.generate_reservation_id(date_str))
-
-            description_lines = [
-                f"予約ID: {reservation_id}",
-                f"サービス: {service_name}",
-                f"サービス一覧: {service_name}",
-                f"担当者: {assigned_staff}",
-                f"お客様: {client_name}",
-                f"所要時間: {duration_minutes}分",
-                "予約元: LINE Bot",
-            ]
-            store_id = reservation_data.get("store_id")
-            if store_id:
-                description_lines.append(f"Store ID: {store_id}")
-            if selected_staff:
-                description_lines.append(f"Selected Staff: {selected_staff}")
-            if assigned_staff:
-                description_lines.append(f"Assigned Staff: {assigned_staff}")
-            if user_id:
-                description_lines.append(f"User ID: {user_id}")
-
-            event = {
-                "summary": f"[予約] {service_name} - {client_name} ({assigned_staff})",
-                "description": "\n".join(description_lines),
-                "start": {"dateTime": start_datetime.isoformat(), "timeZone": self.timezone},
-                "end": {"dateTime": end_datetime.isoformat(), "timeZone": self.timezone},
-            }
-
-            created_event = self.service.events().insert(calendarId=staff_calendar_id, body=event).execute()
-            self._clear_runtime_caches()
-            return {
-                "success": True,
-                "event_id": created_event.get("id", ""),
-                "calendar_id": staff_calendar_id,
-                "html_link": created_event.get("htmlLink", ""),
-                "reservation_id": reservation_id,
-            }
+        return {"calendar_id": staff_calendar_id, "event": event, "reservation_id": reservation_id}
 
-        except HttpError as e:
-            logging.error(f"Google Calendar API error: {e}", exc_info=True)
-            return {"success": False, "reason": "calendar_api_error", "error": str(e)}
-        except Exception as e:
-            logging.error(f"Failed to create calendar event: {e}", exc_info=True)
-            return {"success": False, "reason": "calendar_create_exception", "error": str(e)}
+    def _record_created_event(self, prepared: Dict[str, Any], created_event: Dict[str, Any]) -> Dict[str, Any]:
+        self._clear_runtime_caches()
+        calendar_id = prepared["calendar_id"]
+        reservation_id = prepared["reservation_id"]
+        if created_event.get("id"):
+            _remember_reservation_event(reservation_id, calendar_id, created_event["id"])
+        return {
+            "success": True,
+            "event_id": created_event.get("id", ""),
+            "calendar_id": calendar_id,
+            "html_link": created_event.get("htmlLink", ""),
+            "reservation_id": reservation_id,
+        }
 
     def _parse_event_datetime(self, event_time_obj: Dict[str, Any], default_is_end: bool = False) -> Optional[datetime]:
         try:
-            tz = pytz.timezone(self.timezone)
-
             if "dateTime" in event_time_obj and event_time_obj["dateTime"]:
-                dt = datetime.fromisoformat(event_time_obj["dateTime"].replace("Z", "+00:00"))
-                if dt.tzinfo is None:
-                    return tz.localize(dt)
-                return dt.astimezone(tz)
+                return _parse_event_date_time(event_time_obj["dateTime"], self.timezone)
 
             if "date" in event_time_obj and event_time_obj["date"]:
-                d = datetime.strptime(event_time_obj["date"], "%Y-%m-%d")
-                d = d.replace(hour=0, minute=0)
-                return tz.localize(d)
+                return _parse_event_date(event_time_obj["date"], self.timezone)
 
             return None
         except Exception:
             return None
 
-    def _find_available_periods(self, target_date: date, business_period: Dict[str, str], events: List[Dict[str, Any]]):
-        tz = pytz.timezone(self.timezone)
+    def _event_local_bounds(self, event: Dict[str, Any]) -> Optional[Tuple[datetime, datetime]]:
+        """Event start/end as naive salon-local datetimes, or None when either side is unparseable."""
+        event_start = self._parse_event_datetime(event.get("start", {}), default_is_end=False)
+        event_end = self._parse_event_datetime(event.get("end", {}), default_is_end=True)
+        if not event_start or not event_end:
+            return None
+        # Parsed values are already in self.timezone, so dropping tzinfo yields local wall-clock time
+        return event_start.replace(tzinfo=None), event_end.replace(tzinfo=None)
+
+    def _find_available_periods(
+        self,
+        target_date: date,
+        business_period: Dict[str, str],
+        busy_ranges: List[Tuple[datetime, datetime]],
+    ):
+        """busy_ranges: (start, end) pairs for target_date, already sorted by start."""
+        tz = self._get_tz()
         start_str = business_period.get("start", "00:00")
         end_str = business_period.get("end", "23:59")
 
-        business_start = tz.localize(datetime.combine(target_date, datetime.strptime(start_str, "%H:%M").time()))
-        business_end = tz.localize(datetime.combine(target_date, datetime.strptime(end_str, "%H:%M").time()))
+        business_start = tz.localize(datetime.combine(target_date, _parse_hhmm(start_str)))
+        business_end = tz.localize(datetime.combine(target_date, _parse_hhmm(end_str)))
 
         available_periods = []
         cursor = business_start
 
-        sorted_events: List[Tuple[datetime, datetime]] = []
-        for event in events:
-            event_start = self._parse_event_datetime(event.get("start", {}), default_is_end=False)
-            event_end = self._parse_event_datetime(event.get("end", {}), default_is_end=True)
-            if not event_start or not event_end:
-                continue
-            sorted_events.append((event_start, event_end))
-
-        sorted_events.sort(key=lambda x: x[0])
-
-        for event_start, event_end in sorted_events:
+        for event_start, event_end in busy_ranges:
             if event_end <= cursor:
                 continue
             if event_start >= business_end:
                 break
             if event_start > cursor:
                 available_periods.append({
-                    "start": cursor.strftime("%H:%M"),
-                    "end": min(event_start, business_end).strftime("%H:%M"),
+                    "start": _format_hhmm(cursor),
+                    "end": _format_hhmm(min(event_start, business_end)),
                 })
             cursor = max(cursor, event_end)
             if cursor >= business_end:
@@ -546,8 +787,8 @@ class GoogleCalendarHelper:
 
         if cursor < business_end:
             available_periods.append({
-                "start": cursor.strftime("%H:%M"),
-                "end": business_end.strftime("%H:%M"),
+                "start": _format_hhmm(cursor),
+                "end": _format_hhmm(business_end),
             })
 
         return available_periods
@@ -563,6 +804,27 @@ class GoogleCalendarHelper:
         current_date = start_date.date()
         end_date_only = end_date.date()
 
+        # Parse each event once and bucket it under every local date it covers within the window,
+        # so multi-day events also block the days after their start date
+        busy_by_date: Dict[date, List[Tuple[datetime, datetime]]] = {}
+        for event in events or []:
+            event_start = self._parse_event_datetime(event.get("start", {}), default_is_end=False)
+            event_end = self._parse_event_datetime(event.get("end", {}), default_is_end=True)
+            if not event_start or not event_end:
+                continue
+            busy_by_date.setdefault(event_start.date(), []).append((event_start, event_end))
+
+            last_date = event_end.date()
+            if event_end.time() == time.min:
+                last_date -= timedelta(days=1)
+            covered_date = max(event_start.date() + timedelta(days=1), current_date)
+            while covered_date <= min(last_date, end_date_only):
+                busy_by_date.setdefault(covered_date, []).append((event_start, event_end))
+                covered_date += timedelta(days=1)
+
+        for busy_ranges in busy_by_date.values():
+            busy_ranges.sort(key=lambda x: x[0])
+
         while current_date <= end_date_only:
             if is_closed_date(current_date):
                 current_date += timedelta(days=1)
@@ -573,24 +835,14 @@ class GoogleCalendarHelper:
                 current_date += timedelta(days=1)
                 continue
 
-            date_events = []
-            if events:
-                for event in events:
-                    event_start = self._parse_event_datetime(event.get("start", {}), default_is_end=False)
-                    if not event_start:
-                        continue
-                    if event_start.date() == current_date:
-                        date_events.append(event)
-
-            date_events.sort(
-                key=lambda e: self._parse_event_datetime(e.get("start", {}), default_is_end=False) or datetime.min
-            )
+            date_str = current_date.strftime("%Y-%m-%d")
+            busy_ranges = busy_by_date.get(current_date, [])
 
             for business_period in effective_periods:
-                available_periods = self._find_available_periods(current_date, business_period, date_events)
+                available_periods = self._find_available_periods(current_date, business_period, busy_ranges)
                 for period in available_periods:
                     slots.append({
-                        "date": current_date.strftime("%Y-%m-%d"),
+                        "date": date_str,
                         "time": period["start"],
                         "end_time": period["end"],
                         "available": True,
@@ -619,46 +871,126 @@ class GoogleCalendarHelper:
 
     def get_events_for_date(self, date_str: str, staff_name: str = None) -> List[Dict]:
         self._reload_config_data()
-        calendar_id = self._get_staff_calendar_id(staff_name) if staff_name else self.calendar_id
+        calendar_id = self._get_staff_calendar_id(staff_name)
         if not self.service or not calendar_id:
             return []
 
         cache_key = f"{date_str}|{staff_name or '__BASE__'}"
-        if cache_key in self._events_cache:
-            return list(self._events_cache[cache_key])
+        generation = self._cache_generation
+        cached = self._cache_get(self._events_cache, cache_key)
+        if cached is not _MISSING:
+            return list(cached)
 
         try:
-            tz = pytz.timezone(self.timezone)
-            start_date = datetime.strptime(date_str, "%Y-%m-%d").replace(hour=0, minute=0, second=0, microsecond=0)
-            start_date_aware = tz.localize(start_date)
-            end_date_aware = start_date_aware + timedelta(days=1)
-
-            events_result = self.service.events().list(
-                calendarId=calendar_id,
-                timeMin=start_date_aware.isoformat(),
-                timeMax=end_date_aware.isoformat(),
-                singleEvents=True,
-                orderBy="startTime",
-            ).execute()
-
-            events = events_result.get("items", [])
-            self._events_cache[cache_key] = list(events)
+            time_min, time_max = self._date_time_range(date_str)
+            events = self._list_events(calendar_id, time_min, time_max)
+            self._cache_put(self._events_cache, cache_key, list(events), generation)
             return list(events)
         except Exception as e:
-            print(f"Failed to get events for date {date_str}: {e}")
+            logging.warning(f"Failed to get events for date {date_str}: {e}")
             return []
 
+    def _date_time_range(self, date_str: str) -> Tuple[str, str]:
+        tz = self._get_tz()
+        start_date = _parse_date(date_str)
+        start_date_aware = tz.localize(start_date)
+        end_date_aware = start_date_aware + timedelta(days=1)
+        return start_date_aware.isoformat(), end_date_aware.isoformat()
+
+    def _events_list_request(self, calendar_id: str, time_min: str, time_max: str):
+        return self.service.events().list(
+            calendarId=calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            singleEvents=True,
+            orderBy="startTime",
+            fields=_EVENT_LIST_FIELDS,
+        )
+
+    def _list_events(self, calendar_id: str, time_min: str, time_max: str) -> List[Dict[str, Any]]:
+        key = (calendar_id, time_min, time_max)
+        generation = _shared_events_generation()
+        events = _get_shared_events(key)
+        if events is None:
+            events = self._events_list_request(calendar_id, time_min, time_max).execute().get("items", [])
+            _store_shared_events(key, events, generation)
+        return list(events)
+
+    def _execute_batch(self, requests: List[Any]) -> List[Optional[Dict[str, Any]]]:
+        """Execute list requests in one multipart HTTP request per BATCH_LIMIT.
+
+        Returns responses in request order; failed sub-requests yield None.
+        """
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+
+        def _on_response(request_id, response, exception):
+            if exception is None:
+                responses[int(request_id)] = response
+
+        for offset in range(0, len(requests), self.BATCH_LIMIT):
+            batch = self.service.new_batch_http_request(callback=_on_response)
+            for index, request in enumerate(requests[offset:offset + self.BATCH_LIMIT], start=offset):
+                batch.add(request, request_id=str(index))
+            batch.execute()
+
+        return responses
+
+    def _prefetch_events_for_dates(self, date_strs: List[str], staff_names: List[Optional[str]]) -> None:
+        """Warm _events_cache for several dates and staff calendars with batched round-trips.
+
+        Each (date, calendar) pair stays its own one-day list request, so results
+        are identical to get_events_for_date; only the HTTP round-trips are shared.
+        """
+        if not self.service:
+            return
+
+        generation = self._cache_generation
+        shared_generation = _shared_events_generation()
+        pending: Dict[str, Tuple[str, str, str]] = {}
+        for date_str in date_strs:
+            try:
+                time_min, time_max = self._date_time_range(date_str)
+            except Exception as e:
+                logging.warning(f"Failed to prefetch events for date {date_str}: {e}")
+                continue
+
+            for staff_name in staff_names:
+                cache_key = f"{date_str}|{staff_name or '__BASE__'}"
+                if cache_key in pending or self._cache_get(self._events_cache, cache_key) is not _MISSING:
+                    continue
+                calendar_id = self._get_staff_calendar_id(staff_name)
+                if not calendar_id:
+                    continue
+                list_key = (calendar_id, time_min, time_max)
+                shared = _get_shared_events(list_key)
+                if shared is not None:
+                    self._cache_put(self._events_cache, cache_key, shared, generation)
+                    continue
+                pending[cache_key] = list_key
+
+        if len(pending) < 2:
+            return
+
+        try:
+            responses = self._execute_batch(
+                [self._events_list_request(*list_key) for list_key in pending.values()]
+            )
+        except Exception as e:
+            logging.warning(f"Batch event prefetch failed: {e}")
+            return
+
+        for (cache_key, list_key), response in zip(pending.items(), responses):
+            if response is not None:
+                events = response.get("items", [])
+                _store_shared_events(list_key, events, shared_generation)
+                self._cache_put(self._events_cache, cache_key, list(events), generation)
+
     def _filter_events_by_reservation_id(self, events: List[Dict[str, Any]], exclude_reservation_id: Optional[str]) -> List[Dict[str, Any]]:
         if not exclude_reservation_id:
             return list(events)
 
-        filtered = []
-        for event in events:
-            description = event.get("description", "")
-            if f"予約ID: {exclude_reservation_id}" in description:
-                continue
-            filtered.append(event)
-        return filtered
+        marker = f"予約ID: {exclude_reservation_id}"
+        return [event for event in events if marker not in event.get("description", "")]
 
     def _generate_slots_for_no_preference(
         self,
@@ -673,21 +1005,33 @@ class GoogleCalendarHelper:
 
         normalized_service_ids = self._normalize_service_ids(service_ids=service_ids)
 
-        while current_date <= end_date_only:
-            date_str = current_date.strftime("%Y-%m-%d")
-            for _staff_id, staff_data in self.staff_data.items():
-                if not isinstance(staff_data, dict):
-                    continue
-                if not staff_data.get("is_active", True):
-                    continue
+        eligible_staff_names: List[str] = []
+        for _staff_id, staff_data in self.staff_data.items():
+            if not isinstance(staff_data, dict):
+                continue
+            if not staff_data.get("is_active", True):
+                continue
 
-                staff_name = staff_data.get("name")
-                if not staff_name:
-                    continue
+            staff_name = staff_data.get("name")
+            if not staff_name:
+                continue
 
-                if not self._supports_all_services(staff_data, normalized_service_ids):
-                    continue
+            if not self._supports_all_services(staff_data, normalized_service_ids):
+                continue
+
+            eligible_staff_names.append(staff_name)
 
+        date_strs = []
+        open_date_strs = []
+        while current_date <= end_date_only:
+            date_strs.append(current_date.strftime("%Y-%m-%d"))
+            if not is_closed_date(current_date):
+                open_date_strs.append(date_strs[-1])
+            current_date += timedelta(days=1)
+        self._prefetch_events_for_dates(open_date_strs, eligible_staff_names)
+
+        for date_str in date_strs:
+            for staff_name in eligible_staff_names:
                 try:
                     staff_slots = self.get_available_slots_for_modification(
                         date_str=date_str,
@@ -708,8 +1052,6 @@ class GoogleCalendarHelper:
                             "available": True,
                         }
 
-            current_date += timedelta(days=1)
-
         results = list(slots_map.values())
         results.sort(key=lambda x: (x["date"], x["time"]))
         return results
@@ -735,38 +1077,36 @@ class GoogleCalendarHelper:
             service_cache_key,
             exclude_reservation_id or "__NO_EXCLUDE__",
         ])
-        if cache_key in self._slots_cache:
-            return list(self._slots_cache[cache_key])
+        generation = self._cache_generation
+        cached = self._cache_get(self._slots_cache, cache_key)
+        if cached is not _MISSING:
+            return list(cached)
 
         if staff_name and staff_name not in {"未指定", "指名なし", "おまかせ", "free"}:
             calendar_id = self._get_staff_calendar_id(staff_name)
             if not self.service or not calendar_id:
                 result = self._generate_fallback_slots(start_date, end_date, staff_name)
-                self._slots_cache[cache_key] = list(result)
+                self._cache_put(self._slots_cache, cache_key, list(result), generation)
                 return result
 
             try:
-                tz = pytz.timezone(self.timezone)
+                tz = self._get_tz()
                 start_date_aware = start_date if start_date.tzinfo else tz.localize(start_date)
                 end_date_aware = (end_date + timedelta(days=1)) if end_date.tzinfo is None else end_date + timedelta(days=1)
                 if end_date_aware.tzinfo is None:
                     end_date_aware = tz.localize(end_date_aware)
 
-                events_result = self.service.events().list(
-                    calendarId=calendar_id,
-                    timeMin=start_date_aware.isoformat(),
-                    timeMax=end_date_aware.isoformat(),
-                    singleEvents=True,
-                    orderBy="startTime",
-                ).execute()
-                events = self._filter_events_by_reservation_id(events_result.get("items", []), exclude_reservation_id)
+                events = self._filter_events_by_reservation_id(
+                    self._list_events(calendar_id, start_date_aware.isoformat(), end_date_aware.isoformat()),
+                    exclude_reservation_id,
+                )
                 result = self._generate_all_slots(start_date, end_date, events, staff_name)
-                self._slots_cache[cache_key] = list(result)
+                self._cache_put(self._slots_cache, cache_key, list(result), generation)
                 return result
             except Exception as e:
-                print(f"Failed to get available slots from Google Calendar: {e}")
+                logging.warning(f"Failed to get available slots from Google Calendar: {e}")
                 result = self._generate_fallback_slots(start_date, end_date, staff_name)
-                self._slots_cache[cache_key] = list(result)
+                self._cache_put(self._slots_cache, cache_key, list(result), generation)
                 return result
 
         result = self._generate_slots_for_no_preference(
@@ -775,7 +1115,7 @@ class GoogleCalendarHelper:
             service_ids=normalized_service_ids,
             exclude_reservation_id=exclude_reservation_id,
         )
-        self._slots_cache[cache_key] = list(result)
+        self._cache_put(self._slots_cache, cache_key, list(result), generation)
         return result
 
     def get_available_slots_for_modification(
@@ -795,42 +1135,124 @@ class GoogleCalendarHelper:
             f"MOD|{date_str}|{staff_name or '__NO_STAFF__'}|"
             f"{service_cache_key}|{exclude_reservation_id or '__NO_EXCLUDE__'}"
         )
-        if cache_key in self._slots_cache:
-            return list(self._slots_cache[cache_key])
+        generation = self._cache_generation
+        cached = self._cache_get(self._slots_cache, cache_key)
+        if cached is not _MISSING:
+            return list(cached)
 
         if not staff_name or staff_name in {"指名なし", "未指定", "おまかせ", "free"}:
-            target_date = datetime.strptime(date_str, "%Y-%m-%d")
+            target_date = _parse_date(date_str)
             result = self._generate_slots_for_no_preference(
                 start_date=target_date,
                 end_date=target_date,
                 service_ids=normalized_service_ids,
                 exclude_reservation_id=exclude_reservation_id,
             )
-            self._slots_cache[cache_key] = list(result)
+            self._cache_put(self._slots_cache, cache_key, list(result), generation)
             return result
 
-        calendar_id = self._get_staff_calendar_id(staff_name) if staff_name else self.calendar_id
+        calendar_id = self._get_staff_calendar_id(staff_name)
         if not self.service or not calendar_id:
             result = self._generate_fallback_slots(
-                datetime.strptime(date_str, "%Y-%m-%d"),
-                datetime.strptime(date_str, "%Y-%m-%d") + timedelta(days=1),
+                _parse_date(date_str),
+                _parse_date(date_str) + timedelta(days=1),
                 staff_name,
             )
-            self._slots_cache[cache_key] = list(result)
+            self._cache_put(self._slots_cache, cache_key, list(result), generation)
             return result
 
         try:
+            start_date = _parse_date(date_str)
+            end_date = start_date
+            # Closed days and staff days off have no slots whatever the calendar holds, so skip the fetch
+            if is_closed_date(start_date.date()) or not self._get_effective_business_periods_for_staff(
+                start_date.date(), staff_name
+            ):
+                self._cache_put(self._slots_cache, cache_key, [], generation)
+                return []
+
             all_events = self.get_events_for_date(date_str, staff_name)
             other_events = self._filter_events_by_reservation_id(all_events, exclude_reservation_id)
-            start_date = datetime.strptime(date_str, "%Y-%m-%d")
-            end_date = start_date
             result = self._generate_all_slots(start_date, end_date, other_events, staff_name)
-            self._slots_cache[cache_key] = list(result)
+            self._cache_put(self._slots_cache, cache_key, list(result), generation)
             return result
         except Exception as e:
-            print(f"Failed to get available slots for modification: {e}")
+            logging.warning(f"Failed to get available slots for modification: {e}")
             return []
 
+    def _reservation_search_request(
+        self,
+        calendar_id: str,
+        time_min: str,
+        reservation_id: str,
+        page_token: Optional[str] = None,
+    ):
+        # q= lets Calendar filter on summary/description server-side; callers still confirm the id in the description
+        params = {
+            "calendarId": calendar_id,
+            "q": reservation_id,
+            "timeMin": time_min,
+            "maxResults": _RESERVATION_SEARCH_PAGE_SIZE,
+            "singleEvents": True,
+            "orderBy": "startTime",
+            "fields": f"nextPageToken,{_EVENT_LIST_FIELDS}",
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        return self.service.events().list(**params)
+
+    def _match_reservation_search(
+        self,
+        calendar_id: str,
+        time_min: str,
+        reservation_id: str,
+        events_result: Optional[Dict[str, Any]],
+    ) -> Optional[Dict[str, Any]]:
+        """Find the event carrying reservation_id in a q= search, following nextPageToken.
+
+        q= is a full-text match, so other ids sharing tokens can fill a page before the real event.
+        """
+        while events_result:
+            for event in events_result.get("items", []):
+                if reservation_id in event.get("description", ""):
+                    _remember_reservation_event(reservation_id, calendar_id, event["id"])
+                    return event
+            page_token = events_result.get("nextPageToken")
+            if not page_token:
+                return None
+            events_result = self._reservation_search_request(
+                calendar_id, time_min, reservation_id, page_token
+            ).execute()
+        return None
+
+    def _get_indexed_reservation_event(
+        self,
+        reservation_id: str,
+        calendar_id: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch a reservation directly via the reservation event index; None means fall back to searching."""
+        location = _lookup_reservation_event(reservation_id)
+        if not location or (calendar_id and location[0] != calendar_id):
+            return None
+
+        try:
+            event = self.service.events().get(calendarId=location[0], eventId=location[1]).execute()
+        except Exception:
+            _forget_reservation_event(reservation_id)
+            return None
+
+        # Same visibility as the search: not deleted, still upcoming, and carrying this id
+        event_end = self._parse_event_datetime(event.get("end", {}), default_is_end=True)
+        if (
+            event.get("status") == "cancelled"
+            or reservation_id not in event.get("description", "")
+            or not event_end
+            or event_end <= datetime.now(pytz.utc)
+        ):
+            _forget_reservation_event(reservation_id)
+            return None
+        return event
+
     def get_reservation_by_id(self, reservation_id: str, staff_name: str = None) -> Optional[Dict]:
         if not self.service:
             return None
@@ -840,38 +1262,46 @@ class GoogleCalendarHelper:
                 calendar_id = self._get_staff_calendar_id(staff_name)
                 if not calendar_id:
                     return None
-                events_result = self.service.events().list(
-                    calendarId=calendar_id,
-                    timeMin=datetime.now().isoformat() + "Z",
-                    maxResults=100,
-                    singleEvents=True,
-                    orderBy="startTime",
-                ).execute()
-                for event in events_result.get("items", []):
-                    if reservation_id in event.get("description", ""):
-                        return event
-                return None
-
+                indexed = self._get_indexed_reservation_event(reservation_id, calendar_id)
+                if indexed:
+                    return indexed
+                time_min = datetime.now().isoformat() + "Z"
+                events_result = self._reservation_search_request(calendar_id, time_min, reservation_id).execute()
+                return self._match_reservation_search(calendar_id, time_min, reservation_id, events_result)
+
+            indexed = self._get_indexed_reservation_event(reservation_id)
+            if indexed:
+                return indexed
+
+            time_min = datetime.now().isoformat() + "Z"
+            calendar_ids = []
+            requests = []
             for _staff_id, staff_data in self.staff_data.items():
                 staff_calendar_id = self._get_staff_calendar_id(staff_data.get("name"))
                 if not staff_calendar_id:
                     continue
-                try:
-                    events_result = self.service.events().list(
-                        calendarId=staff_calendar_id,
-                        timeMin=datetime.now().isoformat() + "Z",
-                        maxResults=100,
-                        singleEvents=True,
-                        orderBy="startTime",
-                    ).execute()
-                    for event in events_result.get("items", []):
-                        if reservation_id in event.get("description", ""):
-                            return event
-                except Exception:
-                    continue
+                calendar_ids.append(staff_calendar_id)
+                requests.append(self._reservation_search_request(staff_calendar_id, time_min, reservation_id))
+
+            # One batched round-trip for every staff calendar; match in staff order as before
+            try:
+                responses = self._execute_batch(requests)
+            except Exception as e:
+                logging.warning(f"Batch reservation lookup failed, falling back to sequential requests: {e}")
+                responses = []
+                for request in requests:
+                    try:
+                        responses.append(request.execute())
+                    except Exception:
+                        responses.append(None)
+
+            for staff_calendar_id, events_result in zip(calendar_ids, responses):
+                event = self._match_reservation_search(staff_calendar_id, time_min, reservation_id, events_result)
+                if event:
+                    return event
             return None
         except Exception as e:
-            print(f"Failed to get reservation by ID {reservation_id}: {e}")
+            logging.warning(f"Failed to get reservation by ID {reservation_id}: {e}")
             return None
 
     def cancel_event_by_event_id(self, calendar_id: str, event_id: str) -> bool:
@@ -897,42 +1327,186 @@ class GoogleCalendarHelper:
             logging.error(f"Failed to delete calendar event by event_id: {e}", exc_info=True)
             return False
 
-    def cancel_reservation_by_id(self, reservation_id: str, staff_name: str = None) -> bool:
-        try:
-            event = self.get_reservation_by_id(reservation_id, staff_name)
-            if not event:
-                print(f"Reservation {reservation_id} not found in calendar")
-                return False
+    def _locate_reservation_event(
+        self, reservation_id: str, staff_name: Optional[str] = None
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return (calendar_id, event) for a reservation, or None when it cannot be resolved."""
+        event = self.get_reservation_by_id(reservation_id, staff_name)
+        if not event:
+            logging.info(f"Reservation {reservation_id} not found in calendar")
+            return None
 
-            if not staff_name:
-                summary = event.get("summary", "")
-                try:
-                    import re
-                    m = re.search(r"^\[予約\] (.+) - (.+) \((.+)\)$", summary)
-                    if m:
-                        staff_name = m.group(3)
-                except Exception:
-                    pass
+        if not staff_name:
+            summary = event.get("summary", "")
+            try:
+                m = _RESERVATION_SUMMARY_RE.search(summary)
+                if m:
+                    staff_name = m.group(3)
+            except Exception:
+                pass
+
+        staff_calendar_id = self._get_staff_calendar_id(staff_name)
+        if not staff_calendar_id:
+            return None
+        return staff_calendar_id, event
+
+    def cancel_reservation_by_id(
+        self,
+        reservation_id: str,
+        staff_name: str = None,
+        event_id: Optional[str] = None,
+        calendar_id: Optional[str] = None,
+    ) -> bool:
+        """Delete a reservation's event.
+
+        When the stored event_id/calendar_id are known the event is deleted
+        directly; if that fails (e.g. the ids are stale) the reservation is
+        looked up by id as before.
+        """
+        if event_id and calendar_id and self.service:
+            try:
+                self.service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
+                self._clear_runtime_caches()
+                _forget_reservation_event(reservation_id)
+                return True
+            except Exception as e:
+                logging.warning(
+                    f"Direct delete failed for reservation {reservation_id} "
+                    f"(calendar_id={calendar_id}, event_id={event_id}); searching instead: {e}"
+                )
 
-            staff_calendar_id = self._get_staff_calendar_id(staff_name) if staff_name else self.calendar_id
-            if not staff_calendar_id:
+        try:
+            located = self._locate_reservation_event(reservation_id, staff_name)
+            if not located:
                 return False
+            staff_calendar_id, event = located
 
             self.service.events().delete(calendarId=staff_calendar_id, eventId=event["id"]).execute()
             self._clear_runtime_caches()
+            _forget_reservation_event(reservation_id)
             return True
         except Exception as e:
-            print(f"Failed to cancel reservation {reservation_id}: {e}")
+            logging.error(f"Failed to cancel reservation {reservation_id}: {e}")
             return False
 
+    def move_reservation_event(
+        self,
+        reservation_id: str,
+        old_staff_name: Optional[str],
+        reservation_data: Dict[str, Any],
+        client_name: str,
+    ) -> Dict[str, Any]:
+        """Replace a reservation's Calendar event, possibly on another staff calendar.
+
+        The old event is deleted and the new one inserted in a single batch
+        request. Returns the same shape as create_reservation_event_with_result();
+        reason "cancel_failed" means the original event was left in place, and
+        reason "insert_failed" means the original was deleted but the new event
+        could not be created (see _restore_moved_event).
+        """
+        if not self.service:
+            logging.error("Google Calendar not configured; event move aborted")
+            return {"success": False, "reason": "calendar_not_configured"}
+
+        try:
+            located = self._locate_reservation_event(reservation_id, old_staff_name)
+            if not located:
+                return {"success": False, "reason": "cancel_failed"}
+            old_calendar_id, old_event = located
+
+            # The old event is still on the calendar here, so ignore it in the availability check.
+            prepared = self._prepare_reservation_event(
+                {**reservation_data, "exclude_reservation_id": reservation_id},
+                client_name,
+            )
+            if "event" not in prepared:
+                return prepared
+
+            results: Dict[str, Tuple[Any, Optional[Exception]]] = {}
+
+            def _on_response(request_id, response, exception):
+                results[request_id] = (response, exception)
+
+            events = self.service.events()
+            batch = self.service.new_batch_http_request(callback=_on_response)
+            batch.add(events.delete(calendarId=old_calendar_id, eventId=old_event["id"]), request_id="del")
+            batch.add(events.insert(calendarId=prepared["calendar_id"], body=prepared["event"]), request_id="ins")
+            batch.execute()
+
+            _, delete_error = results.get("del", (None, RuntimeError("no batch response")))
+            created_event, insert_error = results.get("ins", (None, RuntimeError("no batch response")))
+            delete_status = getattr(getattr(delete_error, "resp", None), "status", None)
+            deleted = delete_error is None or delete_status == 404
+
+            if not deleted:
+                logging.error(f"Failed to delete original event for reservation {reservation_id}: {delete_error}")
+                if insert_error is None and created_event and created_event.get("id"):
+                    # Keep a single event per reservation: drop the copy we just created.
+                    self.cancel_event_by_event_id(prepared["calendar_id"], created_event["id"])
+                self._clear_runtime_caches()
+                return {"success": False, "reason": "cancel_failed", "error": str(delete_error)}
+
+            _forget_reservation_event(reservation_id)
+            if insert_error is not None:
+                logging.warning(f"Insert failed in reservation move batch, retrying once: {insert_error}")
+                try:
+                    created_event = self.service.events().insert(
+                        calendarId=prepared["calendar_id"], body=prepared["event"]
+                    ).execute()
+                except Exception as retry_error:
+                    logging.error(f"Insert retry failed after deleting original event for reservation {reservation_id}: {retry_error}")
+                    return self._restore_moved_event(reservation_id, old_calendar_id, old_event, retry_error)
+            return self._record_created_event(prepared, created_event)
+
+        except HttpError as e:
+            self._clear_runtime_caches()
+            logging.error(f"Google Calendar API error: {e}", exc_info=True)
+            return {"success": False, "reason": "calendar_api_error", "error": str(e)}
+        except Exception as e:
+            self._clear_runtime_caches()
+            logging.error(f"Failed to move calendar event for reservation {reservation_id}: {e}", exc_info=True)
+            return {"success": False, "reason": "calendar_create_exception", "error": str(e)}
+
+    def _restore_moved_event(
+        self,
+        reservation_id: str,
+        calendar_id: str,
+        old_event: Dict[str, Any],
+        error: Exception,
+    ) -> Dict[str, Any]:
+        """Re-insert the original event after a move deleted it but failed to create the new one.
+
+        On success the result carries the restored event's ids (they differ from
+        the stored ones) so the caller can update its record; otherwise
+        requires_manual_check is set because the reservation has no event at all.
+        """
+        body = {key: old_event[key] for key in ("summary", "description", "start", "end") if key in old_event}
+        result: Dict[str, Any] = {"success": False, "reason": "insert_failed", "error": str(error)}
+        try:
+            restored = self.service.events().insert(calendarId=calendar_id, body=body).execute()
+        except Exception as e:
+            logging.critical(
+                f"Reservation {reservation_id} has no calendar event: move insert and restore both failed: {e}",
+                exc_info=True,
+            )
+            result["requires_manual_check"] = True
+            return result
+        finally:
+            self._clear_runtime_caches()
+
+        if restored.get("id"):
+            _remember_reservation_event(reservation_id, calendar_id, restored["id"])
+        result.update({
+            "restored_event_id": restored.get("id", ""),
+            "restored_calendar_id": calendar_id,
+            "restored_html_link": restored.get("htmlLink", ""),
+        })
+        return result
+
     def _get_staff_calendar_id(self, staff_name: str) -> Optional[str]:
         if not staff_name or staff_name in {"未指定", "指名なし", "おまかせ", "free"}:
             return self.calendar_id
-
-        for _staff_id, staff_data in self.staff_data.items():
-            if staff_data.get("name") == staff_name:
-                return staff_data.get("calendar_id") or self.calendar_id
-        return self.calendar_id
+        return self._staff_calendar_ids.get(staff_name) or self.calendar_id
 
     def get_short_calendar_url(self, staff_name: str = None) -> str:
         try:
@@ -954,21 +1528,38 @@ class GoogleCalendarHelper:
             self.get_events_for_date(date_str, staff_name),
             exclude_reservation_id,
         )
-        tz = pytz.timezone(self.timezone)
         ranges: List[Tuple[datetime, datetime]] = []
         for event in staff_events:
-            event_start = self._parse_event_datetime(event.get("start", {}), default_is_end=False)
-            event_end = self._parse_event_datetime(event.get("end", {}), default_is_end=True)
-            if event_start and event_end:
-                ranges.append(
-                    (
-                        event_start.astimezone(tz).replace(tzinfo=None),
-                        event_end.astimezone(tz).replace(tzinfo=None),
-                    )
-                )
+            bounds = self._event_local_bounds(event)
+            if bounds:
+                ranges.append(bounds)
         ranges.sort(key=lambda x: x[0])
         return ranges
 
+    def _get_busy_index(
+        self,
+        date_str: str,
+        staff_name: str,
+        exclude_reservation_id: str = None,
+    ) -> Tuple[List[datetime], List[datetime]]:
+        """Sorted event starts and the running max of event ends for one staff day."""
+        cache_key = f"{date_str}|{staff_name or '__BASE__'}|{exclude_reservation_id or '__NO_EXCLUDE__'}"
+        generation = self._cache_generation
+        cached = self._cache_get(self._busy_index_cache, cache_key)
+        if cached is not _MISSING:
+            return cached
+
+        starts: List[datetime] = []
+        max_ends: List[datetime] = []
+        for event_start, event_end in self._build_event_ranges_for_staff(date_str, staff_name, exclude_reservation_id):
+            starts.append(event_start)
+            max_ends.append(event_end if not max_ends or event_end > max_ends[-1] else max_ends[-1])
+
+        # Don't pin a failed fetch: only index days whose events actually made it into _events_cache
+        if self._cache_get(self._events_cache, f"{date_str}|{staff_name or '__BASE__'}") is not _MISSING:
+            self._cache_put(self._busy_index_cache, cache_key, (starts, max_ends), generation)
+        return starts, max_ends
+
     def check_staff_availability_for_time(
         self,
         date_str: str,
@@ -986,20 +1577,26 @@ class GoogleCalendarHelper:
         ) == "ok"
 
     def _get_all_events_for_date(self, date_str: str) -> List[Dict[str, Any]]:
-        if date_str in self._all_events_cache:
-            return list(self._all_events_cache[date_str])
+        generation = self._cache_generation
+        cached = self._cache_get(self._all_events_cache, date_str)
+        if cached is not _MISSING:
+            return list(cached)
+
+        staff_names = [
+            staff_data.get("name")
+            for staff_data in self.staff_data.values()
+            if isinstance(staff_data, dict) and staff_data.get("name")
+        ]
+        self._prefetch_events_for_dates([date_str], ([None] if self.calendar_id else []) + staff_names)
 
         all_events: List[Dict[str, Any]] = []
         if self.calendar_id:
             all_events.extend(self.get_events_for_date(date_str, None))
 
-        for _staff_id, staff_data in self.staff_data.items():
-            staff_name_check = staff_data.get("name") if isinstance(staff_data, dict) else None
-            if not staff_name_check:
-                continue
+        for staff_name_check in staff_names:
             all_events.extend(self.get_events_for_date(date_str, staff_name_check))
 
-        self._all_events_cache[date_str] = list(all_events)
+        self._cache_put(self._all_events_cache, date_str, list(all_events), generation)
         return list(all_events)
 
     def check_user_time_conflict(
@@ -1016,31 +1613,23 @@ class GoogleCalendarHelper:
                 self._get_all_events_for_date(date_str),
                 exclude_reservation_id,
             )
-            start_datetime = datetime.strptime(f"{date_str} {start_time}", "%Y-%m-%d %H:%M")
-            end_datetime = datetime.strptime(f"{date_str} {end_time}", "%Y-%m-%d %H:%M")
-            tz = pytz.timezone(self.timezone)
+            start_datetime = _parse_date_time(date_str, start_time)
+            end_datetime = _parse_date_time(date_str, end_time)
 
             for event in all_events:
                 if self._is_user_reservation(event, user_id):
-                    event_start = self._parse_event_datetime(event.get("start", {}), default_is_end=False)
-                    event_end = self._parse_event_datetime(event.get("end", {}), default_is_end=True)
-                    if event_start and event_end:
-                        event_start = event_start.astimezone(tz).replace(tzinfo=None)
-                        event_end = event_end.astimezone(tz).replace(tzinfo=None)
-                        if start_datetime < event_end and end_datetime > event_start:
-                            return True
+                    bounds = self._event_local_bounds(event)
+                    if bounds and start_datetime < bounds[1] and end_datetime > bounds[0]:
+                        return True
             return False
         except Exception as e:
-            print(f"Error checking user time conflict: {e}")
+            logging.error(f"Error checking user time conflict: {e}")
             return True
 
     def _is_user_reservation(self, event: Dict, user_id: str) -> bool:
         try:
-            description = event.get("description", "")
-            if "User ID:" in description:
-                event_user_id = description.split("User ID:")[1].split("\n")[0].strip()
-                return event_user_id == user_id
-            return False
+            m = _USER_ID_RE.search(event.get("description", ""))
+            return bool(m) and m.group(1).strip() == user_id
         except Exception:
             return False
 
@@ -1095,9 +1684,9 @@ class GoogleCalendarHelper:
         }
 
     def _staff_order(self, staff_name: str) -> int:
-        for _, s in self.staff_data.items():
-            if isinstance(s, dict) and s.get("name") == staff_name:
-                return int(s.get("order", 999))
+        staff_data = self._staff_by_name.get(staff_name)
+        if staff_data is not None:
+            return int(staff_data.get("order", 999))
         return 999
 
     def assign_staff_for_free_reservation(
@@ -1121,13 +1710,14 @@ class GoogleCalendarHelper:
             service_cache_key,
             exclude_reservation_id or "__NO_EXCLUDE__",
         ])
-        if cache_key in self._free_staff_assignment_cache:
-            cached = self._free_staff_assignment_cache[cache_key]
+        generation = self._cache_generation
+        cached = self._cache_get(self._free_staff_assignment_cache, cache_key)
+        if cached is not _MISSING:
             return dict(cached) if cached else None
 
         end_time = self._calculate_end_time(start_time, duration_minutes)
         if not end_time:
-            self._free_staff_assignment_cache[cache_key] = None
+            self._cache_put(self._free_staff_assignment_cache, cache_key, None, generation)
             return None
 
         candidates: List[Dict[str, Any]] = []
@@ -1168,7 +1758,7 @@ class GoogleCalendarHelper:
             })
 
         if not candidates:
-            self._free_staff_assignment_cache[cache_key] = None
+            self._cache_put(self._free_staff_assignment_cache, cache_key, None, generation)
             return None
 
         candidates.sort(
@@ -1179,7 +1769,7 @@ class GoogleCalendarHelper:
             )
         )
         selected = candidates[0]
-        self._free_staff_assignment_cache[cache_key] = dict(selected)
+        self._cache_put(self._free_staff_assignment_cache, cache_key, dict(selected), generation)
         return dict(selected)
 
     def _calculate_end_time(self, start_time: str, duration_minutes: int) -> Optional[str]:
@@ -1203,8 +1793,8 @@ class GoogleCalendarHelper:
     ) -> Optional[str]:
         duration_minutes = 0
         try:
-            start_dt = datetime.strptime(f"{date_str} {start_time}", "%Y-%m-%d %H:%M")
-            end_dt = datetime.strptime(f"{date_str} {end_time}", "%Y-%m-%d %H:%M")
+            start_dt = _parse_date_time(date_str, start_time)
+            end_dt = _parse_date_time(date_str, end_time)
             duration_minutes = int((end_dt - start_dt).total_seconds() // 60)
         except Exception:
             pass
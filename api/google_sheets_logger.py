@@ -1,11 +1,14 @@
 import os
 import json
+import queue
+import random
 import re
 import logging
 import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Tuple, Callable
 
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
@@ -13,6 +16,30 @@ from dotenv import load_dotenv
 import pytz
 
 
+_RATE_LIMIT_MAX_RETRIES = 3
+# バックグラウンド書き込みワーカーのスレッドだけ active=True になります。
+_background_writer_state = threading.local()
+
+
+def _call_with_backoff(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Sheets APIの429（クォータ超過）だけ、ジッター付き指数バックオフで再試行する。
+
+    LINE返信を待たせないよう、再試行はバックグラウンド書き込みワーカー内に限り、
+    Webhook処理中の同期呼び出しでは429をそのまま呼び出し元へ返します。
+    """
+    max_retries = _RATE_LIMIT_MAX_RETRIES if getattr(_background_writer_state, "active", False) else 0
+    for attempt in range(max_retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status != 429 or attempt >= max_retries:
+                raise
+            delay = (2 ** attempt) + random.uniform(0, 1)
+            logging.warning(f"Sheets API rate limited; retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
 class GoogleSheetsLogger:
     """Google Sheets logger for Beauty Links.
 
@@ -246,6 +273,7 @@ class GoogleSheetsLogger:
         self.tokyo_tz = pytz.timezone("Asia/Tokyo")
         self._records_cache: Dict[str, Dict[str, Any]] = {}
         self._cache_ttl_seconds = 8
+        self._today_refresh_state = threading.local()
         self._setup_connection()
         self._initialized = True
 
@@ -623,8 +651,14 @@ class GoogleSheetsLogger:
 
 
     def _get_cancellation_history_worksheet(self):
-        if self.cancellation_history_worksheet is None:
-            self._setup_connection()
+        if self.cancellation_history_worksheet:
+            return self.cancellation_history_worksheet
+        self.cancellation_history_worksheet = self._get_or_create_worksheet(
+            title=self.CANCELLATION_HISTORY_SHEET_TITLE,
+            rows=1000,
+            cols=len(self.CANCELLATION_HISTORY_HEADERS),
+            headers=self.CANCELLATION_HISTORY_HEADERS,
+        )
         return self.cancellation_history_worksheet
 
     def _get_users_records(self) -> List[Dict[str, Any]]:
@@ -1091,7 +1125,7 @@ class GoogleSheetsLogger:
                 "ユーザーID": user_id,
                 "メニューJSON": self._json_dumps_services(services),
             }
-            ws.append_row(self._record_to_row(record), value_input_option="RAW")
+            _call_with_backoff(ws.append_row, self._record_to_row(record), value_input_option="RAW")
             self._invalidate_cache("reservation_records")
 
             # append_row 後に電話番号セルだけを明示的に RAW 文字列で上書きする。
@@ -1227,7 +1261,7 @@ class GoogleSheetsLogger:
                 updated["メニュー表示用"] = selected_menu_label
             row_values = self._record_to_row(self._normalize_legacy_reservation_record(updated))
             end_col = self._column_number_to_letter(len(self.RESERVATION_HEADERS))
-            ws.update(f"A{row_index}:{end_col}{row_index}", [row_values], value_input_option="RAW")
+            _call_with_backoff(ws.update, f"A{row_index}:{end_col}{row_index}", [row_values], value_input_option="RAW")
             try:
                 phone_col = self.RESERVATION_HEADERS.index("電話番号") + 1
                 self._write_phone_cell_as_text(ws, row_index, phone_col, row_values[phone_col - 1])
@@ -1279,7 +1313,31 @@ class GoogleSheetsLogger:
         except Exception as e:
             logging.warning(f"Failed to clear 今日の予約 data rows: {e}")
 
+    @contextmanager
+    def deferred_today_refresh(self):
+        """ブロック内の「今日の予約」再構築を1回にまとめる。
+
+        再構築は1回で十数回のAPI呼び出しになるため、連続した書き込みでは最後に1回だけ実行します。
+        """
+        state = self._today_refresh_state
+        if getattr(state, "depth", 0):
+            state.depth += 1
+        else:
+            state.depth = 1
+            state.pending = False
+        try:
+            yield
+        finally:
+            state.depth -= 1
+            if state.depth == 0 and state.pending:
+                state.pending = False
+                self.refresh_today_reservations()
+
     def refresh_today_reservations(self) -> bool:
+        state = self._today_refresh_state
+        if getattr(state, "depth", 0):
+            state.pending = True
+            return True
         ws = self._get_today_reservations_worksheet()
         if not ws:
             return False
@@ -1332,7 +1390,7 @@ class GoogleSheetsLogger:
                 data.get("status_display") or self._to_sheet_status(data.get("status", "")),
                 data.get("remarks", data.get("note", "")),
             ]
-            ws.append_row(row, value_input_option="RAW")
+            _call_with_backoff(ws.append_row, row, value_input_option="RAW")
             return True
         except Exception as e:
             logging.error(f"Failed to append cancellation history: {e}", exc_info=True)
@@ -1383,7 +1441,7 @@ class GoogleSheetsLogger:
                 "同意日時": "",
                 "入力状態": "",
             }
-            ws.append_row(self._user_record_to_row(record), value_input_option="RAW")
+            _call_with_backoff(ws.append_row, self._user_record_to_row(record), value_input_option="RAW")
             self._invalidate_cache("users_records")
 
             # append_row 後に電話番号セルだけを明示的にRAW文字列で上書きする。
@@ -1560,3 +1618,92 @@ def get_sheets_logger() -> GoogleSheetsLogger:
         _sheets_logger_instance = GoogleSheetsLogger()
     return _sheets_logger_instance
 
+
+# DB正本運用時のSheetsバックアップ書き込みは、LINE返信を待たせないようバックグラウンドで実行します。
+# 1本のワーカーでFIFO順に処理するため、同じ予約の「保存→更新→キャンセル」の順序は保たれます。
+# ワーカーは最大 _BACKGROUND_WRITE_BATCH_SIZE 件 / _BACKGROUND_WRITE_BATCH_WINDOW 秒分をまとめて処理し、
+# 「今日の予約」の再構築はまとめた書き込みごとに1回だけ行います。
+_BACKGROUND_WRITE_QUEUE_SIZE = 1000
+_BACKGROUND_WRITE_BATCH_SIZE = 100
+_BACKGROUND_WRITE_BATCH_WINDOW = 0.5
+# ワーカーはデーモンスレッドのため、終了時は flush_sheets_writes でキューが空になるまで待ちます。
+_BACKGROUND_WRITE_FLUSH_TIMEOUT = 20.0
+_background_write_queue: Optional["queue.Queue[Tuple[Callable[..., Any], tuple, dict]]"] = None
+_background_write_lock = threading.Lock()
+
+
+def _background_write_worker(write_queue: "queue.Queue[Tuple[Callable[..., Any], tuple, dict]]") -> None:
+    _background_writer_state.active = True
+    while True:
+        batch = [write_queue.get()]
+        deadline = time.monotonic() + _BACKGROUND_WRITE_BATCH_WINDOW
+        while len(batch) < _BACKGROUND_WRITE_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(write_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        try:
+            with get_sheets_logger().deferred_today_refresh():
+                for func, args, kwargs in batch:
+                    try:
+                        func(*args, **kwargs)
+                    except Exception as e:
+                        logging.error(f"Background Sheets write failed ({getattr(func, '__name__', func)}): {e}", exc_info=True)
+        except Exception as e:
+            logging.error(f"Background Sheets batch failed: {e}", exc_info=True)
+        finally:
+            for _ in batch:
+                write_queue.task_done()
+
+
+def submit_sheets_write(func: Callable[..., Any], *args, **kwargs) -> bool:
+    """Sheetsへの書き込みをバックグラウンドキューに積む。
+
+    キューが満杯（Sheets障害が長引いた場合など）のときは破棄して False を返します。
+    """
+    global _background_write_queue
+    with _background_write_lock:
+        if _background_write_queue is None:
+            _background_write_queue = queue.Queue(maxsize=_BACKGROUND_WRITE_QUEUE_SIZE)
+            threading.Thread(
+                target=_background_write_worker,
+                args=(_background_write_queue,),
+                daemon=True,
+                name="SheetsBackgroundWriter",
+            ).start()
+        write_queue = _background_write_queue
+
+    try:
+        write_queue.put_nowait((func, args, kwargs))
+        return True
+    except queue.Full:
+        logging.warning(f"Sheets background queue is full; dropping {getattr(func, '__name__', func)}")
+        return False
+
+
+def flush_sheets_writes(timeout: float = _BACKGROUND_WRITE_FLUSH_TIMEOUT) -> bool:
+    """キュー済みのSheets書き込みが全て終わるまで最大 timeout 秒待つ。
+
+    時間内に終わらなかった場合は残件数をログに残して False を返します。
+    """
+    with _background_write_lock:
+        write_queue = _background_write_queue
+    if write_queue is None:
+        return True
+
+    deadline = time.monotonic() + timeout
+    with write_queue.all_tasks_done:
+        while write_queue.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logging.error(
+                    f"Sheets background writes not flushed within {timeout:g}s; "
+                    f"{write_queue.unfinished_tasks} write(s) will be lost"
+                )
+                return False
+            write_queue.all_tasks_done.wait(remaining)
+    return True
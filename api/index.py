@@ -1,18 +1,22 @@
+import asyncio
 import os
 import re
 import logging
 import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import wraps
 from urllib.parse import parse_qs
 from typing import Optional
 
 from fastapi import FastAPI, Request, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from dotenv import load_dotenv
-from linebot.v3 import WebhookHandler
+from linebot.v3 import WebhookParser
 from linebot.v3.exceptions import InvalidSignatureError
 from linebot.v3.messaging import (
     Configuration,
-    ApiClient,
-    MessagingApi,
     ReplyMessageRequest,
     TextMessage,
     TemplateMessage,
@@ -28,14 +32,14 @@ from api.rag_faq import RAGFAQ
 from api.chatgpt_faq import ChatGPTFAQ
 from api.reservation_flow import ReservationFlow
 from api.reminder_scheduler import reminder_scheduler
-from api.faq_menu import send_faq_menu, send_faq_answer_by_item, get_faq_by_number
+from api.faq_menu import send_faq_menu, send_faq_answer_by_item, get_faq_by_number, get_messaging_api
 from api.service_menu import (
     send_service_menu,
     send_single_menu_categories,
     send_single_menu_services,
 )
 from api.staff_intro import send_staff_intro
-from api.google_sheets_logger import get_sheets_logger
+from api.google_sheets_logger import get_sheets_logger, flush_sheets_writes
 from api.user_consent_manager import user_consent_manager
 from api.repositories.database_customer_repository import DatabaseCustomerRepository
 
@@ -48,7 +52,11 @@ if not LINE_CHANNEL_ACCESS_TOKEN or not LINE_CHANNEL_SECRET:
     raise RuntimeError("Missing LINE credentials in environment variables.")
 
 configuration = Configuration(access_token=LINE_CHANNEL_ACCESS_TOKEN)
-handler = WebhookHandler(LINE_CHANNEL_SECRET)
+parser = WebhookParser(LINE_CHANNEL_SECRET)
+
+# 返信ごとにApiClientを作るとコネクションプール（TLSセッション）も作り直しになるため、
+# FAQメニューと同じ MessagingApi をプロセス全体で使い回します（終了時は faq_menu 側で閉じます）。
+_messaging_api = get_messaging_api(configuration)
 
 # Supabase/PostgreSQL を顧客情報の正本として扱う Repository
 customer_repo = DatabaseCustomerRepository()
@@ -62,7 +70,7 @@ try:
     # Set LINE configuration for reservation flow
     reservation_flow.set_line_configuration(configuration)
 
-    print("All modules initialized successfully")
+    logging.info("All modules initialized successfully")
 except Exception as e:
     logging.error(f"Failed to initialize modules: {e}", exc_info=True)
     rag_faq = None
@@ -71,24 +79,114 @@ except Exception as e:
 
 app = FastAPI()
 
-# Global variable to track scheduler thread
-scheduler_thread = None
+# Reminder scheduler task running on the event loop
+scheduler_task: Optional[asyncio.Task] = None
 
-_PROFILE_CACHE = {}
+# LINE表示名のプロセス内キャッシュ（user_id -> {"display_name", "fetched_at"}）。
+# 同じユーザーの連続メッセージで get_profile のHTTP往復を省略します。
+# 上限を超えたら最も長く参照されていないユーザーから捨てます（LRU）。
+_PROFILE_CACHE: "OrderedDict[str, dict]" = OrderedDict()
 _PROFILE_CACHE_TTL_SECONDS = 3600
+_PROFILE_CACHE_MAX_ENTRIES = 10000
+_PROFILE_CACHE_LOCK = threading.Lock()
 
 # 同意後の電話番号入力待ち状態。
 # プロセス内メモリ管理のため、サーバー再起動時は解除されます。
 _PHONE_INPUT_WAITING_USERS = set()
 _PHONE_INPUT_LOCK = threading.Lock()
 
+# Webhookはスレッドプールで並行処理するため、同一ユーザーのイベントだけは順番に処理します。
+# ロックは処理中のユーザー分だけ保持され、使われなくなると自動で破棄されます。
+_USER_EVENT_LOCKS = weakref.WeakValueDictionary()
+_USER_EVENT_LOCKS_GUARD = threading.Lock()
+
+
+def _get_user_event_lock(user_id: Optional[str]) -> threading.Lock:
+    with _USER_EVENT_LOCKS_GUARD:
+        lock = _USER_EVENT_LOCKS.get(user_id or "")
+        if lock is None:
+            lock = threading.Lock()
+            _USER_EVENT_LOCKS[user_id or ""] = lock
+        return lock
+
+
+def serialize_per_user(func):
+    """同一ユーザーのイベント処理が並行しないようにするデコレーター。"""
+    @wraps(func)
+    def wrapper(event):
+        user_id = getattr(getattr(event, "source", None), "user_id", None)
+        with _get_user_event_lock(user_id):
+            return func(event)
+
+    return wrapper
 
-CONSENT_MESSAGE_TEXTS = {
+
+CONSENT_MESSAGE_TEXTS = frozenset({
     "同意画面を開く",
     "同意する",
     "同意しない",
     "詳細を見る",
-}
+})
+
+# 同意前でも受け付けるメッセージ
+CONSENT_BYPASS = CONSENT_MESSAGE_TEXTS | {"よくある質問"}
+
+SERVICE_MENU_KEYWORDS = frozenset({"サービス一覧", "サービスメニュー", "メニュー"})
+
+# 同意関連のボタンは内容が固定のため、イベントごとに組み立てずに使い回します。
+CONSENT_REMINDER_BUTTON = TemplateMessage(
+    alt_text="利用案内をご確認ください",
+    template=ButtonsTemplate(
+        text="ご予約の前に、利用案内の確認をお願いします。",
+        actions=[
+            MessageAction(
+                label="同意画面を開く",
+                text="同意画面を開く",
+            )
+        ],
+    ),
+)
+
+FOLLOW_CONSENT_BUTTON = TemplateMessage(
+    alt_text="ご利用前に同意が必要です",
+    template=ButtonsTemplate(
+        text="ご利用前に、予約システムの利用案内をご確認ください。",
+        actions=[
+            MessageAction(
+                label="ご利用前に同意",
+                text="同意画面を開く",
+            )
+        ],
+    ),
+)
+
+CONSENT_YES_NO_BUTTON = TemplateMessage(
+    alt_text="利用案内をご確認ください",
+    template=ButtonsTemplate(
+        text="内容をご確認のうえ、お選びください。",
+        actions=[
+            MessageAction(label="同意する", text="同意する"),
+            MessageAction(label="同意しない", text="同意しない"),
+            PostbackAction(
+                label="詳細を見る",
+                data="action=view_consent_detail",
+                display_text="詳細を見る",
+            ),
+        ],
+    ),
+)
+
+CONSENT_DETAIL_BUTTON = TemplateMessage(
+    alt_text="利用規約・プライバシーポリシー詳細",
+    template=ButtonsTemplate(
+        text="詳細をご確認のうえ、お選びください。",
+        actions=[
+            MessageAction(label="同意する", text="同意する"),
+            MessageAction(label="同意しない", text="同意しない"),
+            MessageAction(label="要約に戻る", text="同意画面を開く"),
+        ],
+    ),
+)
 
 
 
@@ -227,10 +325,9 @@ def user_has_registered_phone(user_id: str) -> bool:
 
 
 def reply_text(reply_token: str, text: str) -> None:
-    with ApiClient(configuration) as api_client:
-        MessagingApi(api_client).reply_message(
-            ReplyMessageRequest(reply_token=reply_token, messages=[TextMessage(text=text)])
-        )
+    _messaging_api.reply_message(
+        ReplyMessageRequest(reply_token=reply_token, messages=[TextMessage(text=text)])
+    )
 
 
 def handle_phone_number_input(user_id: str, user_name: str, message_text: str, reply_token: str):
@@ -274,43 +371,47 @@ def handle_phone_number_input(user_id: str, user_name: str, message_text: str, r
             pass
 
 
-def get_cached_display_name(user_id: str) -> str:
-    import time as _time
-
-    cached = _PROFILE_CACHE.get(user_id)
-    if cached and (_time.time() - cached["fetched_at"]) <= _PROFILE_CACHE_TTL_SECONDS:
+def get_cached_display_name(user_id: str, refresh: bool = False) -> str:
+    with _PROFILE_CACHE_LOCK:
+        cached = _PROFILE_CACHE.get(user_id)
+        if cached:
+            _PROFILE_CACHE.move_to_end(user_id)
+    if (
+        not refresh
+        and cached
+        and (time.time() - cached["fetched_at"]) <= _PROFILE_CACHE_TTL_SECONDS
+    ):
         return cached["display_name"]
 
     try:
-        with ApiClient(configuration) as api_client:
-            profile = MessagingApi(api_client).get_profile(user_id)
-            display_name = profile.display_name
-            _PROFILE_CACHE[user_id] = {"display_name": display_name, "fetched_at": _time.time()}
-            return display_name
+        profile = _messaging_api.get_profile(user_id)
+        display_name = profile.display_name
     except Exception as e:
         logging.warning(f"Could not fetch user profile for {user_id}: {e}")
         return cached["display_name"] if cached else "Unknown"
 
+    with _PROFILE_CACHE_LOCK:
+        _PROFILE_CACHE[user_id] = {"display_name": display_name, "fetched_at": time.time()}
+        _PROFILE_CACHE.move_to_end(user_id)
+        while len(_PROFILE_CACHE) > _PROFILE_CACHE_MAX_ENTRIES:
+            _PROFILE_CACHE.popitem(last=False)
+    return display_name
+
 
 @app.on_event("startup")
 async def startup_event():
     """Start the reminder scheduler on application startup"""
-    global scheduler_thread
+    global scheduler_task
 
     try:
         if reminder_scheduler.enabled:
-            print("Starting reminder scheduler...")
+            logging.info("Starting reminder scheduler...")
 
-            scheduler_thread = threading.Thread(
-                target=reminder_scheduler.run_scheduler,
-                daemon=True,
-                name="ReminderScheduler",
-            )
-            scheduler_thread.start()
+            scheduler_task = asyncio.create_task(reminder_scheduler.run_scheduler_async())
 
-            print("Reminder scheduler started successfully")
+            logging.info("Reminder scheduler started successfully")
         else:
-            print("Reminder scheduler is disabled")
+            logging.info("Reminder scheduler is disabled")
 
     except Exception as e:
         logging.error(f"Failed to start reminder scheduler: {e}", exc_info=True)
@@ -319,11 +420,19 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up on application shutdown"""
-    global scheduler_thread
+    global scheduler_task
+
+    if scheduler_task and not scheduler_task.done():
+        logging.info("Stopping reminder scheduler...")
+        scheduler_task.cancel()
+        try:
+            await scheduler_task
+        except asyncio.CancelledError:
+            pass
 
-    if scheduler_thread and scheduler_thread.is_alive():
-        print("Stopping reminder scheduler...")
-        # daemon threadなので、メインプロセス終了時に停止
+    # DB正本運用時のSheetsバックアップはバックグラウンドキューに残っている可能性があるため、書き切ってから終了します。
+    logging.info("Flushing queued Sheets writes...")
+    await run_in_threadpool(flush_sheets_writes)
 
 
 @app.get("/")
@@ -334,10 +443,8 @@ async def health():
 @app.get("/api/reminder-status")
 async def reminder_status():
     """Get reminder scheduler status"""
-    global scheduler_thread
-
     status = reminder_scheduler.get_status()
-    status["scheduler_thread_alive"] = scheduler_thread.is_alive() if scheduler_thread else False
+    status["scheduler_running"] = bool(scheduler_task and not scheduler_task.done())
     return status
 
 
@@ -347,7 +454,10 @@ async def callback(request: Request, x_line_signature: str = Header(None)):
     body_str = body.decode("utf-8")
 
     try:
-        handler.handle(body_str, x_line_signature)
+        # 署名検証とJSON解析はここで1回だけ行い、イベント種別ごとのハンドラーへ直接振り分ける
+        events = parser.parse(body_str, x_line_signature)
+        # ハンドラーはLINE/Google/Sheetsへの同期I/Oを含むため、イベントループを塞がないようスレッドで実行する
+        await run_in_threadpool(dispatch_events, events)
     except InvalidSignatureError as e:
         logging.error(f"Signature error: {e}")
         raise HTTPException(status_code=400, detail="Invalid signature")
@@ -357,7 +467,88 @@ async def callback(request: Request, x_line_signature: str = Header(None)):
     return "OK"
 
 
-@handler.add(MessageEvent, message=TextMessageContent)
+def dispatch_events(events) -> None:
+    """Webhookのイベントを種別ごとのハンドラーへ順番に渡す。"""
+    for event in events:
+        if isinstance(event, MessageEvent):
+            if isinstance(event.message, TextMessageContent):
+                handle_message(event)
+        elif isinstance(event, PostbackEvent):
+            handle_postback(event)
+        elif isinstance(event, FollowEvent):
+            handle_follow(event)
+
+
+def _cmd_consent_screen(user_id: str, user_name: str, reply_token: str):
+    return handle_consent_screen(user_id, user_name, reply_token)
+
+
+def _cmd_consent_detail(user_id: str, user_name: str, reply_token: str):
+    return handle_consent_detail(user_id, user_name, reply_token)
+
+
+def _cmd_consent_yes(user_id: str, user_name: str, reply_token: str):
+    return handle_consent_response(user_id, user_name, "同意する", reply_token)
+
+
+def _cmd_consent_no(user_id: str, user_name: str, reply_token: str):
+    return handle_consent_response(user_id, user_name, "同意しない", reply_token)
+
+
+def _cmd_service_menu(user_id: str, user_name: str, reply_token: str):
+    try:
+        send_service_menu(reply_token, configuration)
+    except Exception as e:
+        logging.error(f"Failed to send service menu: {e}", exc_info=True)
+        reply_text(reply_token, "現在サービス一覧を表示できません。しばらくしてから再度お試しください。")
+
+
+def _cmd_staff_intro(user_id: str, user_name: str, reply_token: str):
+    try:
+        send_staff_intro(reply_token, configuration)
+    except Exception as e:
+        logging.error(f"Failed to send staff intro: {e}", exc_info=True)
+        reply_text(reply_token, "現在スタッフ紹介を表示できません。しばらくしてから再度お試しください。")
+
+
+def _cmd_faq_menu(user_id: str, user_name: str, reply_token: str):
+    try:
+        logging.info(f"User {user_id} requested FAQ menu")
+        send_faq_menu(reply_token, configuration)
+        logging.info(f"FAQ menu sent successfully to user {user_id}")
+    except Exception as e:
+        logging.error(f"Failed to send FAQ menu: {e}", exc_info=True)
+        try:
+            reply_text(
+                reply_token,
+                "申し訳ございませんが、よくある質問の表示中にエラーが発生しました。しばらくしてから再度お試しください。",
+            )
+        except Exception as reply_error:
+            logging.error(f"Failed to send error message: {reply_error}", exc_info=True)
+
+
+def _cmd_ping(user_id: str, user_name: str, reply_token: str):
+    reply_text(reply_token, "pong")
+
+
+# 完全一致で処理するコマンド（message_text -> handler(user_id, user_name, reply_token)）。
+# 同意系は電話番号入力待ちより優先、それ以外は電話番号入力待ちの後に判定します。
+CONSENT_COMMANDS = {
+    "同意画面を開く": _cmd_consent_screen,
+    "詳細を見る": _cmd_consent_detail,
+    "同意する": _cmd_consent_yes,
+    "同意しない": _cmd_consent_no,
+}
+
+MENU_COMMANDS = {
+    **{keyword: _cmd_service_menu for keyword in SERVICE_MENU_KEYWORDS},
+    "スタッフ紹介": _cmd_staff_intro,
+    "よくある質問": _cmd_faq_menu,
+    "ping": _cmd_ping,
+}
+
+
+@serialize_per_user
 def handle_message(event: MessageEvent):
     message_text = event.message.text.strip()
     user_id = event.source.user_id
@@ -370,8 +561,7 @@ def handle_message(event: MessageEvent):
 
     # Check consent (except for consent-related messages / phone input after consent)
     if (
-        message_text not in CONSENT_MESSAGE_TEXTS
-        and message_text != "よくある質問"
+        message_text not in CONSENT_BYPASS
         and not is_phone_input_waiting(user_id)
     ):
         try:
@@ -384,30 +574,15 @@ def handle_message(event: MessageEvent):
 長い説明ではなく、まずは大切なポイントだけ確認できます。
 以下のボタンからお進みください。"""
 
-                consent_button = TemplateMessage(
-                    alt_text="利用案内をご確認ください",
-                    template=ButtonsTemplate(
-                        text="ご予約の前に、利用案内の確認をお願いします。",
-                        actions=[
-                            MessageAction(
-                                label="同意画面を開く",
-                                text="同意画面を開く",
-                            )
+                _messaging_api.reply_message_with_http_info(
+                    ReplyMessageRequest(
+                        reply_token=event.reply_token,
+                        messages=[
+                            TextMessage(text=consent_reminder),
+                            CONSENT_REMINDER_BUTTON,
                         ],
-                    ),
-                )
-
-                with ApiClient(configuration) as api_client:
-                    line_bot_api = MessagingApi(api_client)
-                    line_bot_api.reply_message_with_http_info(
-                        ReplyMessageRequest(
-                            reply_token=event.reply_token,
-                            messages=[
-                                TextMessage(text=consent_reminder),
-                                consent_button,
-                            ],
-                        )
                     )
+                )
                 return
         except Exception as e:
             logging.error(f"Failed to check user consent: {e}", exc_info=True)
@@ -428,88 +603,19 @@ def handle_message(event: MessageEvent):
 
     try:
         # Consent flow
-        if message_text == "同意画面を開く":
-            user_name = get_cached_display_name(user_id)
-            return handle_consent_screen(user_id, user_name, event.reply_token)
-
-        elif message_text == "詳細を見る":
-            user_name = get_cached_display_name(user_id)
-            return handle_consent_detail(user_id, user_name, event.reply_token)
-
-        elif message_text in ["同意する", "同意しない"]:
-            user_name = get_cached_display_name(user_id)
-            return handle_consent_response(user_id, user_name, message_text, event.reply_token)
+        command = CONSENT_COMMANDS.get(message_text)
+        if command:
+            return command(user_id, user_name, event.reply_token)
 
         # Phone number input after consent must be handled before FAQ / reservation flow.
         if is_phone_input_waiting(user_id):
             user_name = get_cached_display_name(user_id)
             return handle_phone_number_input(user_id, user_name, message_text, event.reply_token)
 
-        # Service menu
-        service_menu_keywords = ["サービス一覧", "サービスメニュー", "メニュー"]
-        if message_text in service_menu_keywords:
-            try:
-                send_service_menu(event.reply_token, configuration)
-                return
-            except Exception as e:
-                logging.error(f"Failed to send service menu: {e}", exc_info=True)
-                with ApiClient(configuration) as api_client:
-                    MessagingApi(api_client).reply_message(
-                        ReplyMessageRequest(
-                            reply_token=event.reply_token,
-                            messages=[
-                                TextMessage(
-                                    text="現在サービス一覧を表示できません。しばらくしてから再度お試しください。"
-                                )
-                            ],
-                        )
-                    )
-                return
-
-        # Staff intro
-        if message_text == "スタッフ紹介":
-            try:
-                send_staff_intro(event.reply_token, configuration)
-                return
-            except Exception as e:
-                logging.error(f"Failed to send staff intro: {e}", exc_info=True)
-                with ApiClient(configuration) as api_client:
-                    MessagingApi(api_client).reply_message(
-                        ReplyMessageRequest(
-                            reply_token=event.reply_token,
-                            messages=[
-                                TextMessage(
-                                    text="現在スタッフ紹介を表示できません。しばらくしてから再度お試しください。"
-                                )
-                            ],
-                        )
-                    )
-                return
-
-        # FAQ menu
-        if message_text == "よくある質問":
-            try:
-                print(f"User {user_id} requested FAQ menu")
-                send_faq_menu(event.reply_token, configuration)
-                print(f"FAQ menu sent successfully to user {user_id}")
-                return
-            except Exception as e:
-                logging.error(f"Failed to send FAQ menu: {e}", exc_info=True)
-                try:
-                    with ApiClient(configuration) as api_client:
-                        MessagingApi(api_client).reply_message(
-                            ReplyMessageRequest(
-                                reply_token=event.reply_token,
-                                messages=[
-                                    TextMessage(
-                                        text="申し訳ございませんが、よくある質問の表示中にエラーが発生しました。しばらくしてから再度お試しください。"
-                                    )
-                                ],
-                            )
-                        )
-                except Exception as reply_error:
-                    logging.error(f"Failed to send error message: {reply_error}", exc_info=True)
-                return
+        # Menu / staff intro / FAQ menu / ping
+        command = MENU_COMMANDS.get(message_text)
+        if command:
+            return command(user_id, user_name, event.reply_token)
 
         # FAQ answer by number (予約フロー中は予約側を優先)
         faq_item = None
@@ -525,60 +631,55 @@ def handle_message(event: MessageEvent):
         if faq_item:
             try:
                 send_faq_answer_by_item(event.reply_token, faq_item, configuration)
-                print(f"FAQ answer sent successfully for {message_text} to user {user_id}")
+                logging.info(f"FAQ answer sent successfully for {message_text} to user {user_id}")
                 return
             except Exception as e:
                 logging.error(f"Failed to handle FAQ input: {e}", exc_info=True)
                 try:
-                    with ApiClient(configuration) as api_client:
-                        MessagingApi(api_client).reply_message(
-                            ReplyMessageRequest(
-                                reply_token=event.reply_token,
-                                messages=[
-                                    TextMessage(
-                                        text="申し訳ございませんが、よくある質問の回答表示中にエラーが発生しました。しばらくしてから再度お試しください。"
-                                    )
-                                ],
-                            )
+                    _messaging_api.reply_message(
+                        ReplyMessageRequest(
+                            reply_token=event.reply_token,
+                            messages=[
+                                TextMessage(
+                                    text="申し訳ございませんが、よくある質問の回答表示中にエラーが発生しました。しばらくしてから再度お試しください。"
+                                )
+                            ],
                         )
+                    )
                 except Exception as reply_error:
                     logging.error(f"Failed to send error message: {reply_error}", exc_info=True)
                 return
 
-        # ping-pong test
-        if message_text == "ping":
-            reply = "pong"
-        else:
-            # 1. Reservation flow first
-            if reservation_flow:
-                if message_text.startswith("このスタッフで予約する:"):
-                    staff_id = message_text.split(":", 1)[1].strip()
-                    reservation_reply = reservation_flow.start_reservation_with_staff(user_id, staff_id)
+        # 1. Reservation flow first
+        if reservation_flow:
+            if message_text.startswith("このスタッフで予約する:"):
+                staff_id = message_text.split(":", 1)[1].strip()
+                reservation_reply = reservation_flow.start_reservation_with_staff(user_id, staff_id)
+            else:
+                reservation_reply = reservation_flow.get_response(user_id, message_text)
+
+            if reservation_reply:
+                if isinstance(reservation_reply, dict) and "text" in reservation_reply:
+                    reply = reservation_reply["text"]
+                    quick_reply_items = reservation_reply.get("quick_reply_items") or []
                 else:
-                    reservation_reply = reservation_flow.get_response(user_id, message_text)
+                    reply = reservation_reply
+                    quick_reply_items = []
+            else:
+                # 2. RAG FAQ + ChatGPT workflow
+                if rag_faq and chatgpt_faq:
+                    kb_facts = rag_faq.get_kb_facts(message_text)
 
-                if reservation_reply:
-                    if isinstance(reservation_reply, dict) and "text" in reservation_reply:
-                        reply = reservation_reply["text"]
-                        quick_reply_items = reservation_reply.get("quick_reply_items") or []
+                    if kb_facts:
+                        reply = chatgpt_faq.get_response(message_text, kb_facts["kb_facts"])
+                        logging.info(f"KB hit for user {user_id}: {message_text} -> {kb_facts.get('category', 'unknown')}")
                     else:
-                        reply = reservation_reply
-                        quick_reply_items = []
+                        reply = "申し訳ございませんが、その質問については分かりません。直接お電話にてお問い合わせください。"
+                        logging.warning(f"KB miss for user {user_id}: {message_text}")
                 else:
-                    # 2. RAG FAQ + ChatGPT workflow
-                    if rag_faq and chatgpt_faq:
-                        kb_facts = rag_faq.get_kb_facts(message_text)
-
-                        if kb_facts:
-                            reply = chatgpt_faq.get_response(message_text, kb_facts["kb_facts"])
-                            print(f"KB hit for user {user_id}: {message_text} -> {kb_facts.get('category', 'unknown')}")
-                        else:
-                            reply = "申し訳ございませんが、その質問については分かりません。直接お電話にてお問い合わせください。"
-                            logging.warning(f"KB miss for user {user_id}: {message_text}")
-                    else:
-                        reply = "申し訳ございませんが、現在システムの初期化中です。しばらくお待ちください。"
-            else:
-                reply = "申し訳ございませんが、現在システムの初期化中です。しばらくお待ちください。"
+                    reply = "申し訳ございませんが、現在システムの初期化中です。しばらくお待ちください。"
+        else:
+            reply = "申し訳ございませんが、現在システムの初期化中です。しばらくお待ちください。"
 
         # Reply
         try:
@@ -593,13 +694,12 @@ def handle_message(event: MessageEvent):
             else:
                 text_message = TextMessage(text=reply)
 
-            with ApiClient(configuration) as api_client:
-                MessagingApi(api_client).reply_message(
-                    ReplyMessageRequest(
-                        reply_token=event.reply_token,
-                        messages=[text_message],
-                    )
+            _messaging_api.reply_message(
+                ReplyMessageRequest(
+                    reply_token=event.reply_token,
+                    messages=[text_message],
                 )
+            )
 
         except Exception as e:
             logging.error(f"LINE reply error: {e}", exc_info=True)
@@ -610,7 +710,7 @@ def handle_message(event: MessageEvent):
         return
 
 
-@handler.add(PostbackEvent)
+@serialize_per_user
 def handle_postback(event: PostbackEvent):
     """Handle postback events such as Flex button taps."""
     user_id = event.source.user_id
@@ -686,23 +786,23 @@ def handle_postback(event: PostbackEvent):
         else:
             text_message = TextMessage(text=reply_body)
 
-        with ApiClient(configuration) as api_client:
-            MessagingApi(api_client).reply_message(
-                ReplyMessageRequest(
-                    reply_token=event.reply_token,
-                    messages=[text_message],
-                )
+        _messaging_api.reply_message(
+            ReplyMessageRequest(
+                reply_token=event.reply_token,
+                messages=[text_message],
             )
+        )
     except Exception as e:
         logging.error(f"LINE reply error (postback): {e}", exc_info=True)
         return
 
 
-@handler.add(FollowEvent)
+@serialize_per_user
 def handle_follow(event: FollowEvent):
     """Handle when a user adds the bot as a friend"""
     user_id = event.source.user_id
-    user_name = get_cached_display_name(user_id)
+    # 友だち追加（ブロック解除を含む）は表示名が変わっている可能性があるため取り直す。
+    user_name = get_cached_display_name(user_id, refresh=True)
 
     # 友だち追加時点で顧客DBにも登録する。
     ensure_customer_in_database(user_id, user_name)
@@ -715,7 +815,7 @@ def handle_follow(event: FollowEvent):
             display_name=user_name,
             phone_number="",
         )
-        print(f"Saved user data to Users sheet: {user_name} ({user_id})")
+        logging.info(f"Saved user data to Users sheet: {user_name} ({user_id})")
     except Exception as e:
         logging.error(f"Failed to save user data to Users sheet: {e}", exc_info=True)
 
@@ -727,30 +827,15 @@ def handle_follow(event: FollowEvent):
 確認はすぐに完了できます。"""
         )
 
-        consent_button = TemplateMessage(
-            alt_text="ご利用前に同意が必要です",
-            template=ButtonsTemplate(
-                text="ご利用前に、予約システムの利用案内をご確認ください。",
-                actions=[
-                    MessageAction(
-                        label="ご利用前に同意",
-                        text="同意画面を開く",
-                    )
+        _messaging_api.reply_message_with_http_info(
+            ReplyMessageRequest(
+                reply_token=event.reply_token,
+                messages=[
+                    welcome_message,
+                    FOLLOW_CONSENT_BUTTON,
                 ],
-            ),
-        )
-
-        with ApiClient(configuration) as api_client:
-            line_bot_api = MessagingApi(api_client)
-            line_bot_api.reply_message_with_http_info(
-                ReplyMessageRequest(
-                    reply_token=event.reply_token,
-                    messages=[
-                        welcome_message,
-                        consent_button,
-                    ],
-                )
             )
+        )
     except Exception as e:
         logging.error(f"Failed to send consent button: {e}", exc_info=True)
 
@@ -774,35 +859,17 @@ def handle_consent_screen(user_id: str, user_name: str, reply_token: str):
 
 詳しい内容を確認したい場合は「詳細を見る」からご確認いただけます。"""
 
-        consent_button = TemplateMessage(
-            alt_text="利用案内をご確認ください",
-            template=ButtonsTemplate(
-                text="内容をご確認のうえ、お選びください。",
-                actions=[
-                    MessageAction(label="同意する", text="同意する"),
-                    MessageAction(label="同意しない", text="同意しない"),
-                    PostbackAction(
-                        label="詳細を見る",
-                        data="action=view_consent_detail",
-                        display_text="詳細を見る",
-                    ),
+        _messaging_api.reply_message_with_http_info(
+            ReplyMessageRequest(
+                reply_token=reply_token,
+                messages=[
+                    TextMessage(text=consent_screen_message),
+                    CONSENT_YES_NO_BUTTON,
                 ],
-            ),
-        )
-
-        with ApiClient(configuration) as api_client:
-            line_bot_api = MessagingApi(api_client)
-            line_bot_api.reply_message_with_http_info(
-                ReplyMessageRequest(
-                    reply_token=reply_token,
-                    messages=[
-                        TextMessage(text=consent_screen_message),
-                        consent_button,
-                    ],
-                )
             )
+        )
 
-        print(f"Sent consent summary screen to user: {user_id} ({user_name})")
+        logging.info(f"Sent consent summary screen to user: {user_id} ({user_name})")
 
     except Exception as e:
         logging.error(f"Failed to send consent screen: {e}", exc_info=True)
@@ -856,31 +923,17 @@ def handle_consent_detail(user_id: str, user_name: str, reply_token: str):
 
 内容をご確認のうえ、問題なければ「同意する」をお選びください。"""
 
-        consent_button = TemplateMessage(
-            alt_text="利用規約・プライバシーポリシー詳細",
-            template=ButtonsTemplate(
-                text="詳細をご確認のうえ、お選びください。",
-                actions=[
-                    MessageAction(label="同意する", text="同意する"),
-                    MessageAction(label="同意しない", text="同意しない"),
-                    MessageAction(label="要約に戻る", text="同意画面を開く"),
+        _messaging_api.reply_message_with_http_info(
+            ReplyMessageRequest(
+                reply_token=reply_token,
+                messages=[
+                    TextMessage(text=consent_detail_message),
+                    CONSENT_DETAIL_BUTTON,
                 ],
-            ),
-        )
-
-        with ApiClient(configuration) as api_client:
-            line_bot_api = MessagingApi(api_client)
-            line_bot_api.reply_message_with_http_info(
-                ReplyMessageRequest(
-                    reply_token=reply_token,
-                    messages=[
-                        TextMessage(text=consent_detail_message),
-                        consent_button,
-                    ],
-                )
             )
+        )
 
-        print(f"Sent consent detail screen to user: {user_id} ({user_name})")
+        logging.info(f"Sent consent detail screen to user: {user_id} ({user_name})")
 
     except Exception as e:
         logging.error(f"Failed to send consent detail screen: {e}", exc_info=True)
@@ -904,27 +957,23 @@ def handle_consent_response(user_id: str, user_name: str, message_text: str, rep
             # 電話番号が未登録なら、絶対にウェルカムへ進めず電話番号入力へ送る。
             if not user_has_registered_phone(user_id):
                 set_phone_input_waiting(user_id)
-                with ApiClient(configuration) as api_client:
-                    line_bot_api = MessagingApi(api_client)
-                    line_bot_api.reply_message_with_http_info(
-                        ReplyMessageRequest(
-                            reply_token=reply_token,
-                            messages=[TextMessage(text=build_phone_input_prompt())],
-                        )
+                _messaging_api.reply_message_with_http_info(
+                    ReplyMessageRequest(
+                        reply_token=reply_token,
+                        messages=[TextMessage(text=build_phone_input_prompt())],
                     )
-                print(f"User consented and phone input requested: {user_id} ({user_name})")
+                )
+                logging.info(f"User consented and phone input requested: {user_id} ({user_name})")
                 return
 
             clear_phone_input_waiting(user_id)
-            with ApiClient(configuration) as api_client:
-                line_bot_api = MessagingApi(api_client)
-                line_bot_api.reply_message_with_http_info(
-                    ReplyMessageRequest(
-                        reply_token=reply_token,
-                        messages=[TextMessage(text=build_welcome_after_phone_message())],
-                    )
+            _messaging_api.reply_message_with_http_info(
+                ReplyMessageRequest(
+                    reply_token=reply_token,
+                    messages=[TextMessage(text=build_welcome_after_phone_message())],
                 )
-            print(f"User consented with existing phone: {user_id} ({user_name})")
+            )
+            logging.info(f"User consented with existing phone: {user_id} ({user_name})")
 
         elif message_text == "同意しない":
             goodbye_message = f"""承知いたしました。
@@ -935,18 +984,16 @@ def handle_consent_response(user_id: str, user_name: str, message_text: str, rep
 
 ありがとうございました。"""
 
-            with ApiClient(configuration) as api_client:
-                line_bot_api = MessagingApi(api_client)
-                line_bot_api.reply_message_with_http_info(
-                    ReplyMessageRequest(
-                        reply_token=reply_token,
-                        messages=[TextMessage(text=goodbye_message)],
-                    )
+            _messaging_api.reply_message_with_http_info(
+                ReplyMessageRequest(
+                    reply_token=reply_token,
+                    messages=[TextMessage(text=goodbye_message)],
                 )
+            )
 
             update_customer_consent_in_database(user_id, user_name, False)
             clear_phone_input_waiting(user_id)
-            print(f"User declined consent: {user_id} ({user_name})")
+            logging.info(f"User declined consent: {user_id} ({user_name})")
 
     except Exception as e:
         logging.error(f"Failed to handle consent response: {e}", exc_info=True)
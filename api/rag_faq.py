@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 from typing import Dict, Any, Optional, List
 
 import faiss
@@ -16,6 +17,8 @@ class RAGFAQ:
         self.sales_kb: List[Dict[str, Any]] = loader.export_legacy_kb_list(entry_type="sales")
 
         self.model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+        # 同じ質問の埋め込みは使い回す（情報KB・売上KBの両方の検索や、繰り返しの質問で再計算しない）
+        self._query_embedding = lru_cache(maxsize=1024)(self._encode_query)
 
         self.info_index = None
         self.sales_index = None
@@ -153,6 +156,11 @@ class RAGFAQ:
 
         return None
 
+    def _encode_query(self, query: str):
+        query_embedding = self.model.encode([query], convert_to_numpy=True).astype("float32")
+        faiss.normalize_L2(query_embedding)
+        return query_embedding
+
     def _semantic_search(
         self,
         query: str,
@@ -163,8 +171,7 @@ class RAGFAQ:
         if not query or index is None or not search_items:
             return None
 
-        query_embedding = self.model.encode([query], convert_to_numpy=True).astype("float32")
-        faiss.normalize_L2(query_embedding)
+        query_embedding = self._query_embedding(query)
 
         k = min(5, len(search_items))
         scores, indices = index.search(query_embedding, k)
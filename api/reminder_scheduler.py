@@ -8,6 +8,7 @@ Priority:
 3. default fallback (09:00)
 """
 
+import asyncio
 import os
 import time
 import json
@@ -23,6 +24,8 @@ class ReminderScheduler:
         self.enabled = os.getenv("REMINDER_SCHEDULER_ENABLED", "true").lower() == "true"
         self.timezone = os.getenv("TIMEZONE", "Asia/Tokyo")
         self.default_remind_time = "来店前日 09:00 自動配信"
+        # Tokyo date of the last scheduled run, so an early wake-up never runs the same day twice
+        self._last_run_date = None
 
         if self.enabled:
             print("Reminder scheduler enabled")
@@ -272,6 +275,34 @@ class ReminderScheduler:
                 logging.error(f"Error in scheduler loop: {e}", exc_info=True)
                 time.sleep(60)
 
+    async def run_scheduler_async(self):
+        """Run the scheduler on the application's event loop.
+
+        Sleeps until the next scheduled time instead of polling every minute;
+        the reminder run itself does blocking Sheets/LINE I/O, so it goes to a worker thread.
+        """
+        if not self.enabled:
+            logging.info("Scheduler is disabled, not running")
+            return
+
+        while True:
+            try:
+                next_run = self.get_next_run_time()
+                delay = (next_run - datetime.now(next_run.tzinfo)).total_seconds()
+                logging.info(f"Next reminder run at {next_run.strftime('%Y-%m-%d %H:%M')} Tokyo time")
+                await asyncio.sleep(max(delay, 0))
+                if datetime.now(next_run.tzinfo) < next_run:
+                    # Woke up early (clock step or drift): sleep again for the remainder
+                    continue
+                self._last_run_date = next_run.date()
+                await asyncio.to_thread(self._run_reminders)
+            except asyncio.CancelledError:
+                logging.info("Reminder scheduler task cancelled")
+                raise
+            except Exception as e:
+                logging.error(f"Error in scheduler loop: {e}", exc_info=True)
+                await asyncio.sleep(60)
+
     def run_reminders_now(self):
         """Manually run reminders (for testing)."""
         print("Manually running reminders...")
@@ -297,7 +328,7 @@ class ReminderScheduler:
             microsecond=0
         )
 
-        if next_run <= current_tokyo_time:
+        if next_run <= current_tokyo_time or next_run.date() == self._last_run_date:
             next_run += timedelta(days=1)
 
         return next_run
@@ -56,7 +56,7 @@ class ReminderSystem:
             timezone_str = self.salon_config.get("timezone", "Asia/Tokyo")
             tokyo_tz = pytz.timezone(timezone_str)
             tomorrow = (datetime.now(tokyo_tz) + timedelta(days=1)).strftime("%Y-%m-%d")
-            print(f"Getting reservations for tomorrow: {tomorrow} ({timezone_str})")
+            logging.info(f"Getting reservations for tomorrow: {tomorrow} ({timezone_str})")
 
             calendar_helper = GoogleCalendarHelper()
             events = calendar_helper.get_events_for_date(tomorrow)
@@ -79,7 +79,7 @@ class ReminderSystem:
             except Exception as e:
                 logging.warning(f"Could not get reservations from sheets: {e}")
 
-            print(f"Found {len(reservations)} reservations for {tomorrow}")
+            logging.info(f"Found {len(reservations)} reservations for {tomorrow}")
             return reservations
 
         except Exception as e:
@@ -300,7 +300,7 @@ class ReminderSystem:
             )
 
             if response.status_code == 200:
-                print(f"Reminder sent successfully to user {user_id} for reservation {reservation.get('reservation_id')}")
+                logging.info(f"Reminder sent successfully to user {user_id} for reservation {reservation.get('reservation_id')}")
                 return True
             else:
                 logging.error(f"Failed to send reminder to user {user_id}: {response.status_code} - {response.text}")
@@ -319,15 +319,15 @@ class ReminderSystem:
             reservation_id = reservation.get("reservation_id")
             client_name = reservation.get("client_name", "N/A")
 
-            print(f"Looking for user ID for reservation {reservation_id} (client: {client_name})")
+            logging.info(f"Looking for user ID for reservation {reservation_id} (client: {client_name})")
 
             if reservation_id:
                 user_id = sheets_logger.get_user_id_for_reservation(reservation_id)
                 if user_id:
-                    print(f"Found user ID {user_id} for reservation {reservation_id}")
+                    logging.info(f"Found user ID {user_id} for reservation {reservation_id}")
                     return user_id
                 else:
-                    print(f"No user ID found for reservation {reservation_id}")
+                    logging.info(f"No user ID found for reservation {reservation_id}")
 
             logging.warning(f"Could not find user ID for reservation {reservation_id}")
             return None
@@ -355,7 +355,7 @@ class ReminderSystem:
 
     def run_daily_reminders(self) -> Dict[str, Any]:
         """Run daily reminder process"""
-        print("Starting daily reminder process...")
+        logging.info("Starting daily reminder process...")
 
         reservations = self.get_tomorrow_reservations()
 
@@ -363,21 +363,21 @@ class ReminderSystem:
         failed_reservations = []
 
         for reservation in reservations:
-            print(f"Processing reservation: {reservation.get('reservation_id')} for {reservation.get('client_name')}")
+            logging.info(f"Processing reservation: {reservation.get('reservation_id')} for {reservation.get('client_name')}")
             user_id = self.get_user_id_for_reservation(reservation)
 
             if user_id:
-                print(f"Attempting to send reminder to user {user_id}")
+                logging.info(f"Attempting to send reminder to user {user_id}")
                 if self.send_reminder_to_user(reservation, user_id):
                     success_count += 1
-                    print(f"✅ Reminder sent successfully to user {user_id}")
+                    logging.info(f"Reminder sent successfully to user {user_id}")
                 else:
                     failed_reservations.append(reservation)
-                    print(f"❌ Failed to send reminder to user {user_id}")
+                    logging.warning(f"Failed to send reminder to user {user_id}")
             else:
                 logging.warning(f"Could not find user ID for reservation {reservation.get('reservation_id')}")
                 failed_reservations.append(reservation)
-                print(f"❌ No user ID found for reservation {reservation.get('reservation_id')}")
+                logging.warning(f"No user ID found for reservation {reservation.get('reservation_id')}")
 
         # Operator notification for reminder delivery results is disabled by specification.
 
@@ -387,7 +387,7 @@ class ReminderSystem:
             "failed_reservations": failed_reservations,
         }
 
-        print(f"Daily reminder process completed: {success_count}/{len(reservations)} sent successfully")
+        logging.info(f"Daily reminder process completed: {success_count}/{len(reservations)} sent successfully")
         return result
 
 
@@ -3,18 +3,36 @@ import os
 import json
 import time
 import logging
+import threading
+from functools import lru_cache
 from typing import Dict, List, Optional, Any, Union, Tuple
 from datetime import datetime, timedelta, date
 
+import pytz
+
 from api.google_calendar import GoogleCalendarHelper
 from api.business_hours import (
     get_slot_minutes,
     is_open_date,
+    get_open_days_in_range,
     get_reservation_ui_limit_days,
 )
-from api.google_sheets_logger import get_sheets_logger
+from api.google_sheets_logger import get_sheets_logger, submit_sheets_write
 from api.staff_attendance import get_staff_attendance_for_date
 
+# "RES-YYYYMMDD-XXXXXX" as produced by GoogleCalendarHelper.generate_reservation_id
+_RESERVATION_ID_RE = re.compile(r"^RES-\d{8}-[A-Z0-9]{4,8}$")
+
+# Webhookはユーザーごとに並行処理されるため、空き状況の最終確認からCalendarへの登録・変更・キャンセルまでは
+# プロセス全体で1件ずつ実行し、別ユーザー同士の同時予約で同じ枠が二重に埋まらないようにします。
+_BOOKING_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=512)
+def _parse_ymd(date_str: str) -> date:
+    # Date strings are re-parsed many times per message (weekday, same-day, near-term checks)
+    return datetime.strptime(date_str, "%Y-%m-%d").date()
+
 
 class ReservationFlow:
     def __init__(self):
@@ -232,30 +250,17 @@ class ReservationFlow:
             except Exception as e:
                 logging.warning(f"Failed to get staff events for {staff_name} on {selected_date}: {e}")
 
+        exclude_marker = f"予約ID: {exclude_reservation_id}" if exclude_reservation_id else None
         for event in all_events:
-            if exclude_reservation_id:
-                description = event.get("description", "")
-                if f"予約ID: {exclude_reservation_id}" in description:
-                    continue
+            if exclude_marker and exclude_marker in event.get("description", ""):
+                continue
 
             if not self.google_calendar._is_user_reservation(event, user_id):
                 continue
 
-            event_start = self.google_calendar._parse_event_datetime(event.get("start", {}), default_is_end=False)
-            event_end = self.google_calendar._parse_event_datetime(event.get("end", {}), default_is_end=True)
-
-            if event_start and event_end:
-                tz = self.google_calendar.timezone
-                try:
-                    import pytz
-                    local_tz = pytz.timezone(tz)
-                    event_start = event_start.astimezone(local_tz).replace(tzinfo=None)
-                    event_end = event_end.astimezone(local_tz).replace(tzinfo=None)
-                except Exception:
-                    event_start = event_start.replace(tzinfo=None)
-                    event_end = event_end.replace(tzinfo=None)
-
-                event_ranges.append((event_start, event_end))
+            bounds = self.google_calendar._event_local_bounds(event)
+            if bounds:
+                event_ranges.append(bounds)
 
         if runtime_cache is not None:
             runtime_cache["user_day_events"][cache_key] = event_ranges
@@ -478,7 +483,7 @@ class ReservationFlow:
         try:
             if not date_str:
                 return False
-            return datetime.strptime(str(date_str), "%Y-%m-%d").date().weekday() >= 5
+            return _parse_ymd(str(date_str)).weekday() >= 5
         except Exception:
             return False
 
@@ -486,7 +491,7 @@ class ReservationFlow:
         try:
             if not date_str:
                 return False
-            return datetime.strptime(str(date_str), "%Y-%m-%d").date() == datetime.now().date()
+            return _parse_ymd(str(date_str)) == datetime.now().date()
         except Exception:
             return False
 
@@ -495,7 +500,7 @@ class ReservationFlow:
             if not date_str:
                 return False
             near_days = days if days is not None else self._message_strategy_int("near_term_days", 3)
-            target = datetime.strptime(str(date_str), "%Y-%m-%d").date()
+            target = _parse_ymd(str(date_str))
             today = datetime.now().date()
             return 0 <= (target - today).days <= int(near_days)
         except Exception:
@@ -783,8 +788,6 @@ class ReservationFlow:
             if current_datetime > deadline_datetime: reject
         """
         try:
-            import pytz
-
             tokyo_tz = pytz.timezone("Asia/Tokyo")
 
             reservation_datetime_naive = datetime.strptime(
@@ -831,8 +834,6 @@ class ReservationFlow:
 
             limit_hours = self._get_reservation_limit_hours(rule_key, 2)
 
-            import pytz
-
             tokyo_tz = pytz.timezone("Asia/Tokyo")
             reservation_datetime_naive = datetime.strptime(
                 f"{reservation_date} {reservation_start_time}",
@@ -987,8 +988,6 @@ class ReservationFlow:
         Same-day near-future gets the strongest bonus.
         """
         try:
-            import pytz
-
             tokyo_tz = pytz.timezone("Asia/Tokyo")
             now_dt = datetime.now(tokyo_tz)
 
@@ -2089,7 +2088,7 @@ class ReservationFlow:
 
     @staticmethod
     def _date_quick_reply_label(date_str: str) -> str:
-        d = datetime.strptime(date_str, "%Y-%m-%d").date()
+        d = _parse_ymd(date_str)
         wk = ["月", "火", "水", "木", "金", "土", "日"][d.weekday()]
         return f"{d.month}/{d.day}({wk})"
 
@@ -2140,11 +2139,16 @@ class ReservationFlow:
     ) -> List[str]:
         dates_out: List[str] = []
 
+        open_days = set(
+            get_open_days_in_range(
+                max(week_start, today),
+                min(week_start + timedelta(days=6), last_ui),
+            )
+        )
+
         for i in range(7):
             d = week_start + timedelta(days=i)
-            if d < today or d > last_ui:
-                continue
-            if not is_open_date(d):
+            if d not in open_days:
                 continue
 
             ds = d.strftime("%Y-%m-%d")
@@ -2178,7 +2182,7 @@ class ReservationFlow:
             self.user_states[user_id]["date_selection_week_start"] = ws.strftime("%Y-%m-%d")
         else:
             try:
-                ws = datetime.strptime(raw_ws, "%Y-%m-%d").date()
+                ws = _parse_ymd(raw_ws)
             except ValueError:
                 ws = min_ws
                 self.user_states[user_id]["date_selection_week_start"] = ws.strftime("%Y-%m-%d")
@@ -2211,7 +2215,7 @@ class ReservationFlow:
         fallback_header += "※土日・午前中は埋まりやすいためお早めのご予約がおすすめです！\n\n"
         fallback_header += f"※{limit_days}日以降は「{example_date}」の形式でご入力ください。"
 
-        has_weekend_in_week = any(datetime.strptime(ds, "%Y-%m-%d").date().weekday() >= 5 for ds in bookable)
+        has_weekend_in_week = any(_parse_ymd(ds).weekday() >= 5 for ds in bookable)
         near_term_dates = [ds for ds in bookable if self._is_near_term_reservation(ds)]
         context_data = self._build_message_context(user_id, {
             "limit_days": limit_days,
@@ -2327,7 +2331,7 @@ class ReservationFlow:
             selected_date = data.get("date")
             if selected_date:
                 try:
-                    selected_date_obj = datetime.strptime(selected_date, "%Y-%m-%d").date()
+                    selected_date_obj = _parse_ymd(selected_date)
                     state["date_selection_week_start"] = self._calendar_week_monday(
                         selected_date_obj
                     ).strftime("%Y-%m-%d")
@@ -2495,7 +2499,7 @@ class ReservationFlow:
             ]:
                 return "modify"
 
-        if re.match(r"^RES-\d{8}-[A-Z0-9]{4,8}$", message_normalized):
+        if _RESERVATION_ID_RE.match(message_normalized):
             return "general"
 
         if re.match(r"^\d{4}-\d{2}-\d{2}$", message_normalized):
@@ -3010,7 +3014,7 @@ class ReservationFlow:
             st = self.user_states[user_id]
             raw = st.get("date_selection_week_start", min_ws.strftime("%Y-%m-%d"))
             try:
-                ws = datetime.strptime(raw, "%Y-%m-%d").date()
+                ws = _parse_ymd(raw)
             except ValueError:
                 ws = min_ws
             new_ws = max(min_ws, ws - timedelta(days=7))
@@ -3021,7 +3025,7 @@ class ReservationFlow:
             st = self.user_states[user_id]
             raw = st.get("date_selection_week_start", min_ws.strftime("%Y-%m-%d"))
             try:
-                ws = datetime.strptime(raw, "%Y-%m-%d").date()
+                ws = _parse_ymd(raw)
             except ValueError:
                 ws = min_ws
             new_ws = ws + timedelta(days=7)
@@ -3049,7 +3053,7 @@ class ReservationFlow:
             )
 
         try:
-            date_obj = datetime.strptime(selected_date, "%Y-%m-%d").date()
+            date_obj = _parse_ymd(selected_date)
         except ValueError:
             err = (
                 "申し訳ございませんが、日付の形式が正しくありません。\n"
@@ -3083,7 +3087,7 @@ class ReservationFlow:
         try:
             if self._is_no_preference_staff(staff_name):
                 return {"is_working": True, "source": "default", "periods": []}
-            target_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
+            target_date = _parse_ymd(selected_date)
             for _, staff_data in self.staff_members.items():
                 if isinstance(staff_data, dict) and staff_data.get("name") == staff_name:
                     return get_staff_attendance_for_date(staff_data, target_date, fallback_to_store_hours=True)
@@ -3600,12 +3604,13 @@ class ReservationFlow:
                 reservation_repository=self.reservation_repository,
                 notification_manager=notification_manager,
             )
-            transaction_result = transaction.create_reservation(
-                reservation_data=reservation_data,
-                client_name=client_name,
-                final_availability_check=self._check_final_availability,
-                clear_cache=lambda: (self.google_calendar._clear_runtime_caches(), self._clear_runtime_cache(user_id)),
-            )
+            with _BOOKING_LOCK:
+                transaction_result = transaction.create_reservation(
+                    reservation_data=reservation_data,
+                    client_name=client_name,
+                    final_availability_check=self._check_final_availability,
+                    clear_cache=lambda: (self.google_calendar._clear_runtime_caches(), self._clear_runtime_cache(user_id)),
+                )
         except Exception as e:
             logging.error(f"Reservation transaction raised: {e}", exc_info=True)
             return "申し訳ございません。予約登録中にエラーが発生しました。時間をおいてもう一度お試しください。"
@@ -3623,13 +3628,9 @@ class ReservationFlow:
         reservation_data.update(transaction_result.get("reservation_data", {}))
 
         # DBを主保存先にしている場合のみ、予約成功後にSheetsへバックアップ保存します。
-        # Sheetsへのコピーに失敗しても、DB保存済みの予約自体は成功として扱います。
+        # Sheetsへのコピーは返信後にバックグラウンドで行い、失敗してもDB保存済みの予約自体は成功として扱います。
         if self.db_primary_active:
-            try:
-                self.sheets_logger.save_reservation(reservation_data)
-                logging.info("Reservation successfully backed up to Google Sheets after DB save.")
-            except Exception as e:
-                logging.error(f"Sheets sync failed after DB reservation save: {e}", exc_info=True)
+            submit_sheets_write(self.sheets_logger.save_reservation, dict(reservation_data))
 
         try:
             self.google_calendar._clear_runtime_caches()
@@ -3705,40 +3706,65 @@ class ReservationFlow:
             new_data["reservation_id"] = original_reservation_id
             new_data["user_id"] = user_id
 
-            availability_check = self._check_final_availability(new_data)
-            if not availability_check["available"]:
-                if user_id in self.user_states:
-                    del self.user_states[user_id]
-                return f"""❌ 申し訳ございませんが、選択された時間帯は既に他のお客様にご予約いただいておりました。
+            client_name = self._get_line_display_name(user_id)
+            old_staff_name = original_reservation.get("staff")
+
+            with _BOOKING_LOCK:
+                availability_check = self._check_final_availability(new_data)
+                if not availability_check["available"]:
+                    if user_id in self.user_states:
+                        del self.user_states[user_id]
+                    return f"""❌ 申し訳ございませんが、選択された時間帯は既に他のお客様にご予約いただいておりました。
 
 {availability_check["message"]}
 
 別の時間帯で予約変更をお願いいたします。"""
 
-            resolved_staff = availability_check.get("resolved_staff")
-            if resolved_staff:
-                new_data["assigned_staff"] = resolved_staff
-                new_data["staff"] = resolved_staff
-
-            if self._is_no_preference_staff(new_data.get("selected_staff")) or new_data.get("selected_staff") == "free":
-                new_data["selected_staff"] = "free"
-            else:
-                new_data["selected_staff"] = new_data.get("selected_staff") or new_data["staff"]
+                resolved_staff = availability_check.get("resolved_staff")
+                if resolved_staff:
+                    new_data["assigned_staff"] = resolved_staff
+                    new_data["staff"] = resolved_staff
 
-            client_name = self._get_line_display_name(user_id)
+                if self._is_no_preference_staff(new_data.get("selected_staff")) or new_data.get("selected_staff") == "free":
+                    new_data["selected_staff"] = "free"
+                else:
+                    new_data["selected_staff"] = new_data.get("selected_staff") or new_data["staff"]
 
-            old_staff_name = original_reservation.get("staff")
-            cancel_success = self.google_calendar.cancel_reservation_by_id(original_reservation_id, old_staff_name)
-            if not cancel_success:
+                # 元予約の削除と新予約の登録は1回のバッチリクエストでまとめて送信します。
+                calendar_result = self.google_calendar.move_reservation_event(
+                    original_reservation_id,
+                    old_staff_name,
+                    new_data,
+                    client_name,
+                )
+            if calendar_result.get("reason") == "cancel_failed":
                 logging.error(
                     f"[_execute_reservation_modification] Failed to cancel original reservation in calendar: {original_reservation_id}"
                 )
                 return "申し訳ございません。元の予約の更新処理に失敗しました。時間をおいてもう一度お試しください。"
-
-            calendar_result = self.google_calendar.create_reservation_event_with_result(
-                new_data,
-                client_name,
-            )
+            if calendar_result.get("requires_manual_check"):
+                # 元予約のCalendar予定が削除されたまま戻せなかったため、ユーザーには再操作させずサロン側で確認します。
+                if user_id in self.user_states:
+                    del self.user_states[user_id]
+                return (
+                    "予約変更処理中に確認が必要な状態になりました。\n\n"
+                    "サロン側で予約状況を確認いたしますので、"
+                    "同じ内容で再度変更操作を行わず、少しお待ちください。"
+                )
+            if calendar_result.get("restored_event_id"):
+                # 元予約の予定は作り直したためIDが変わっています。予約データ側のCalendar IDも合わせて更新します。
+                restored_ids = {
+                    "calendar_event_id": calendar_result["restored_event_id"],
+                    "calendar_id": calendar_result.get("restored_calendar_id", ""),
+                    "calendar_html_link": calendar_result.get("restored_html_link", ""),
+                }
+                self.reservation_repository.update_reservation_data(original_reservation_id, restored_ids)
+                if self.db_primary_active:
+                    submit_sheets_write(
+                        self.sheets_logger.update_reservation_data,
+                        original_reservation_id,
+                        dict(restored_ids),
+                    )
             if not calendar_result.get("success"):
                 return "申し訳ございません。予約変更中にエラーが発生しました。時間をおいてもう一度お試しください。"
             new_data["calendar_event_id"] = calendar_result.get("event_id", "")
@@ -3781,13 +3807,11 @@ class ReservationFlow:
 
             # DBの更新が成功した後だけ、運営確認用Sheetsへ反映します。
             if self.db_primary_active:
-                try:
-                    self.sheets_logger.update_reservation_data(original_reservation_id, field_updates)
-                except Exception as e:
-                    logging.error(
-                        f"Sheets backup update failed after DB reservation modification: {e}",
-                        exc_info=True,
-                    )
+                submit_sheets_write(
+                    self.sheets_logger.update_reservation_data,
+                    original_reservation_id,
+                    dict(field_updates),
+                )
 
             try:
                 self.google_calendar._clear_runtime_caches()
@@ -3875,8 +3899,6 @@ class ReservationFlow:
 
     def _show_user_reservations_for_modification(self, user_id: str) -> Union[str, Dict[str, Any]]:
         try:
-            import pytz
-
             # DB_PRIMARY=true の場合はDBを正本として予約を取得します。
             # DBを無効にしている場合は、従来どおりSheets Repositoryが使われます。
             reservations = self.reservation_repository.get_user_reservations_by_user_id(user_id)
@@ -3970,7 +3992,7 @@ class ReservationFlow:
         try:
             selected_reservation = None
 
-            if re.match(r"^RES-\d{8}-[A-Z0-9]{4,8}$", message.strip()):
+            if _RESERVATION_ID_RE.match(message.strip()):
                 reservation_id = message.strip()
                 for res in reservations:
                     if res["reservation_id"] == reservation_id:
@@ -4111,8 +4133,6 @@ class ReservationFlow:
 
     def _show_user_reservations_for_cancellation(self, user_id: str) -> Union[str, Dict[str, Any]]:
         try:
-            import pytz
-
             # DB_PRIMARY=true の場合はDBを正本として予約を取得します。
             # DBを無効にしている場合は、従来どおりSheets Repositoryが使われます。
             reservations = self.reservation_repository.get_user_reservations_by_user_id(user_id)
@@ -4197,7 +4217,7 @@ class ReservationFlow:
         reservations = state["user_reservations"]
 
         try:
-            if re.match(r"^RES-\d{8}-[A-Z0-9]{4,8}$", message.strip()):
+            if _RESERVATION_ID_RE.match(message.strip()):
                 reservation_id = message.strip()
                 selected_reservation = None
                 for res in reservations:
@@ -4294,8 +4314,6 @@ class ReservationFlow:
 
     def _execute_reservation_cancellation(self, user_id: str, reservation: Dict[str, Any]) -> str:
         try:
-            import pytz
-
             tokyo_tz = pytz.timezone("Asia/Tokyo")
             current_time = datetime.now(tokyo_tz)
 
@@ -4333,7 +4351,13 @@ class ReservationFlow:
                 return "申し訳ございません。キャンセル情報の保存に失敗しました。\nもう一度お試しください。"
 
             staff_name = reservation.get("staff")
-            calendar_success = self.google_calendar.cancel_reservation_by_id(reservation_id, staff_name)
+            with _BOOKING_LOCK:
+                calendar_success = self.google_calendar.cancel_reservation_by_id(
+                    reservation_id,
+                    staff_name,
+                    event_id=reservation.get("calendar_event_id"),
+                    calendar_id=reservation.get("calendar_id"),
+                )
 
             if not calendar_success:
                 logging.error(
@@ -4355,13 +4379,7 @@ class ReservationFlow:
 
             # DBとCalendarが成功した後だけSheetsにもキャンセルを反映します。
             if self.db_primary_active:
-                try:
-                    self.sheets_logger.update_reservation_status(reservation_id, "Cancelled")
-                except Exception as e:
-                    logging.error(
-                        f"Sheets backup update failed after DB reservation cancellation: {e}",
-                        exc_info=True,
-                    )
+                submit_sheets_write(self.sheets_logger.update_reservation_status, reservation_id, "Cancelled")
 
             try:
                 self.google_calendar._clear_runtime_caches()
@@ -4413,10 +4431,11 @@ class ReservationFlow:
                 if isinstance(previous_reservation, dict)
                 else None
             )
-            calendar_success = self.google_calendar.cancel_reservation_by_id(
-                reservation_id,
-                staff_name,
-            )
+            with _BOOKING_LOCK:
+                calendar_success = self.google_calendar.cancel_reservation_by_id(
+                    reservation_id,
+                    staff_name,
+                )
 
             if not calendar_success:
                 logging.error(
@@ -4440,13 +4459,7 @@ class ReservationFlow:
                 )
 
             if self.db_primary_active:
-                try:
-                    self.sheets_logger.update_reservation_status(reservation_id, "Cancelled")
-                except Exception as e:
-                    logging.error(
-                        f"Sheets backup cancellation sync failed: {e}",
-                        exc_info=True,
-                    )
+                submit_sheets_write(self.sheets_logger.update_reservation_status, reservation_id, "Cancelled")
 
             try:
                 self.google_calendar._clear_runtime_caches()
@@ -2,7 +2,7 @@ import logging
 from datetime import date, datetime
 from typing import Any, Dict, List, Optional
 
-from api.business_hours import get_hours_for_date
+from api.business_hours import get_hours_for_date_fast
 
 WEEKDAY_KEYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
 
@@ -48,13 +48,9 @@ def _minutes_to_time(total_minutes: int) -> str:
 
 def _normalize_store_periods(periods: Any) -> List[Dict[str, str]]:
     results: List[Dict[str, str]] = []
-    if not isinstance(periods, list):
-        return results
-    for item in periods:
-        if not isinstance(item, dict):
-            continue
-        start = _normalize_time_str(item.get('start'))
-        end = _normalize_time_str(item.get('end'))
+    for period_start, period_end in periods or ():
+        start = _normalize_time_str(period_start)
+        end = _normalize_time_str(period_end)
         if not start or not end:
             continue
         if (_time_to_minutes(end) or 0) <= (_time_to_minutes(start) or 0):
@@ -148,7 +144,7 @@ def get_staff_attendance_for_date(
     if not isinstance(target_date, date):
         raise TypeError('target_date must be datetime.date')
 
-    store_periods = _normalize_store_periods(get_hours_for_date(target_date) or [])
+    store_periods = _normalize_store_periods(get_hours_for_date_fast(target_date))
     if not staff_record or not isinstance(staff_record, dict):
         return _default_result(store_periods) if fallback_to_store_hours else {
             'is_working': False, 'start': None, 'end': None, 'source': 'default', 'periods': []
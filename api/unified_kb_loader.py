@@ -1,5 +1,9 @@
-import json
 import os
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
 from typing import Any, Dict, List, Optional
 
 
@@ -46,7 +50,7 @@ class UnifiedKBLoader:
                 continue
             checked.append(normalized_candidate)
 
-            if os.path.exists(normalized_candidate) and os.path.isfile(normalized_candidate):
+            if os.path.isfile(normalized_candidate):
                 return normalized_candidate
 
         raise FileNotFoundError(
@@ -54,8 +58,8 @@ class UnifiedKBLoader:
         )
 
     def _load(self) -> Dict[str, Any]:
-        with open(self.path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(self.path, "rb") as f:
+            data = _json.loads(f.read())
 
         if not isinstance(data, dict):
             raise ValueError("Unified KB must be a JSON object.")
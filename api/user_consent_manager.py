@@ -1,4 +1,5 @@
 import logging
+import threading
 import time
 from typing import Dict, Any, Optional
 
@@ -27,6 +28,11 @@ class UserConsentManager:
         self._customer_repo = DatabaseCustomerRepository()
         self._cache: Dict[str, Dict[str, Any]] = {}
         self._ttl_seconds = 30
+        # 同意はセッション中にまず戻らないため、同意済みの結果だけ長めに保持してメッセージごとのDB参照を省く。
+        # 撤回は revoke_user_consent / invalidate_user で即時に反映される。
+        self._consented_ttl_seconds = 600
+        self._max_cache_entries = 10000
+        self._cache_lock = threading.Lock()
         self._allow_stale_cache_on_error = False
         self._max_stale_seconds = 300
 
@@ -37,7 +43,8 @@ class UserConsentManager:
         item = self._get_cached_item(user_id)
         if not item:
             return None
-        if time.time() - item["fetched_at"] > self._ttl_seconds:
+        ttl = self._consented_ttl_seconds if item["consented"] else self._ttl_seconds
+        if time.time() - item["fetched_at"] > ttl:
             return None
         return item["consented"]
 
@@ -53,13 +60,19 @@ class UserConsentManager:
         return item["consented"]
 
     def _set_cached(self, user_id: str, consented: bool):
-        self._cache[user_id] = {
-            "fetched_at": time.time(),
-            "consented": bool(consented),
-        }
+        with self._cache_lock:
+            # 入れ直して挿入順を更新し、上限を超えたら最も古い確認結果から捨てる
+            self._cache.pop(user_id, None)
+            self._cache[user_id] = {
+                "fetched_at": time.time(),
+                "consented": bool(consented),
+            }
+            while len(self._cache) > self._max_cache_entries:
+                self._cache.pop(next(iter(self._cache)))
 
     def invalidate_user(self, user_id: str):
-        self._cache.pop(user_id, None)
+        with self._cache_lock:
+            self._cache.pop(user_id, None)
 
     def _sync_sheet_consent(self, user_id: str, consented: bool) -> None:
         """店舗閲覧用シートへ補助同期する。失敗してもDBでの同意保存結果は覆さない。"""